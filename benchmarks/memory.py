@@ -0,0 +1,60 @@
+#memory.py
+"""
+Memory per fish for each engine.
+
+Creates fish with tracemalloc running and reports the Python heap growth
+divided by the population. Shared sprite data (surfaces, atlases) is built
+before measuring so only per-fish state is counted:
+
+    python -m benchmarks.memory --counts 1000 10000 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+def measure(engine, fish_count, sprite_path, ticks=1):
+    """Bytes of Python heap per fish after creating and stepping fish_count fish"""
+    from src.headless import create_manager
+
+    manager = create_manager(engine, 4000, 3000, seed=0, workers=1)
+    # Warm the sprite cache so shared surfaces are not charged to the fish
+    manager.create_sprite(sprite_path, 1)
+    manager.clear_all_fish()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    manager.create_sprite(sprite_path, fish_count)
+    for _ in range(ticks):
+        manager.simulate()
+        manager.update_visuals()
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if hasattr(manager, "close"):
+        manager.close()
+    return (after - before) / fish_count
+
+def main():
+    parser = argparse.ArgumentParser(description="Python heap bytes per fish")
+    parser.add_argument("--engine", nargs="+", default=["objects", "swarm"], choices=("objects", "swarm"))
+    parser.add_argument("--counts", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--sprite", default="assets/input/fish.jpg")
+    args = parser.parse_args()
+
+    import pygame
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    for engine in args.engine:
+        for fish_count in args.counts:
+            per_fish = measure(engine, fish_count, args.sprite)
+            print(f"{engine:8s} {fish_count:>7d} fish  {per_fish:8.0f} bytes/fish  "
+                  f"{per_fish * fish_count / (1024 * 1024):8.1f} MB total")
+    pygame.quit()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
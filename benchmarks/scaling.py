@@ -0,0 +1,255 @@
+#scaling.py
+"""
+Simulation and rendering scaling benchmark.
+
+Sweeps fish counts, screen sizes and schooling densities, timing the
+simulate / visual-state / draw stages of each frame offscreen with the SDL
+dummy video driver. Every case runs in its own process so peak RSS is per
+case. Results are written as JSON and can be compared against a stored
+baseline:
+
+    python -m benchmarks.scaling --output bench.json
+    python -m benchmarks.scaling --baseline bench.json --tolerance 0.15
+    python -m benchmarks.scaling --engine parallel --workers 1 2 4 8 --counts 20000
+    python -m benchmarks.scaling --lod-budget 4 --counts 100 1000 5000
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+DEFAULT_COUNTS = (10, 100, 1000, 10000)
+DEFAULT_SIZES = ("800x600", "1200x800", "3840x2160")
+DEFAULT_DENSITIES = ("sparse", "schools", "dense")
+STAGES = ("simulate", "visuals", "draw")
+
+def _populate(manager, sprite_path, fish_count, density):
+    if density == "sparse":
+        manager.create_sprite(sprite_path, fish_count)
+    elif density == "dense":
+        # One tight school, every fish within a few body lengths of the others
+        manager.create_school(sprite_path, fish_count,
+                              manager.screen_width // 2, manager.screen_height // 2)
+    else:
+        while manager.get_fish_count() < fish_count:
+            manager.create_mixed_school(sprite_path, fish_count - manager.get_fish_count())
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_case(engine, fish_count, size, density, frames, sprite_path, seed=0, alloc_frames=3, workers=None,
+             lod_budget_ms=None):
+    """Benchmark one configuration in the current process and return its result dict"""
+    import pygame
+    from src.headless import create_manager
+
+    width, height = (int(v) for v in size.split("x"))
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    screen = pygame.Surface((width, height))
+    background = pygame.Surface((width, height))
+    background.fill((20, 60, 120))
+
+    manager = create_manager(engine, width, height, seed, workers)
+    _populate(manager, sprite_path, fish_count, density)
+    if lod_budget_ms and engine == "objects":
+        from src.lod import LODScheduler
+        manager.lod = LODScheduler(lod_budget_ms)
+    lod = getattr(manager, "lod", None)
+    full_updates = []
+    over_budget = []
+
+    def frame(timings=None):
+        start = time.perf_counter()
+        manager.simulate()
+        simulated = time.perf_counter()
+        manager.update_visuals()
+        visuals = time.perf_counter()
+        screen.blit(background, (0, 0))
+        manager.draw_sprites(screen)
+        drawn = time.perf_counter()
+        if timings is not None:
+            timings["simulate"].append(simulated - start)
+            timings["visuals"].append(visuals - simulated)
+            timings["draw"].append(drawn - visuals)
+            if lod is not None:
+                full_updates.append(lod.last_full)
+                over_budget.append(lod.over_budget)
+
+    frame()  # warm-up, fills lazy caches
+    if lod is not None:
+        # Let the scheduler learn the per-fish costs before measuring
+        for _ in range(30):
+            frame()
+    timings = {stage: [] for stage in STAGES}
+    for _ in range(frames):
+        frame(timings)
+
+    # tracemalloc slows everything down, so allocations get their own pass.
+    # It only sees Python-level allocations, not SDL pixel buffers.
+    tracemalloc.start()
+    alloc_peaks = []
+    for _ in range(alloc_frames):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        frame()
+        alloc_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    if hasattr(manager, "close"):
+        manager.close()
+    pygame.quit()
+
+    totals = [sum(values) for values in zip(*(timings[stage] for stage in STAGES))]
+    stages = {}
+    for stage, values in list(timings.items()) + [("total", totals)]:
+        stages[stage] = {
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p95_ms": _percentile(values, 0.95) * 1000,
+        }
+    return {
+        "engine": engine,
+        "workers": workers if engine == "parallel" else None,
+        "lod_budget_ms": lod_budget_ms if lod is not None else None,
+        "lod_full_per_frame": sum(full_updates) / len(full_updates) if full_updates else None,
+        "lod_over_budget_frames": sum(over_budget) if lod is not None else None,
+        "fish": manager.get_fish_count(),
+        "size": size,
+        "density": density,
+        "frames": frames,
+        "stages": stages,
+        "alloc_kb_per_frame": sum(alloc_peaks) / len(alloc_peaks) / 1024,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+def case_key(case):
+    engine = case["engine"]
+    if case.get("workers"):
+        engine = f"{engine}x{case['workers']}"
+    if case.get("lod_budget_ms"):
+        engine = f"{engine}+lod{case['lod_budget_ms']:g}"
+    return f"{engine}/{case['density']}/{case['size']}/{case['fish']}"
+
+def _run_isolated(args, engine, fish_count, size, density, workers=None):
+    command = [sys.executable, "-m", "benchmarks.scaling", "--single",
+               "--engine", engine, "--counts", str(fish_count), "--sizes", size,
+               "--densities", density, "--frames", str(args.frames), "--sprite", args.sprite]
+    if workers:
+        command += ["--workers", str(workers)]
+    if args.lod_budget:
+        command += ["--lod-budget", str(args.lod_budget)]
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=args.case_timeout)
+    except subprocess.TimeoutExpired:
+        return None
+    if completed.returncode != 0:
+        print(completed.stderr, file=sys.stderr)
+        return None
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Return descriptions of cases whose mean total frame time regressed past tolerance"""
+    previous = {case_key(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        old = previous.get(case_key(case))
+        if old is None:
+            continue
+        old_ms = old["stages"]["total"]["mean_ms"]
+        new_ms = case["stages"]["total"]["mean_ms"]
+        if old_ms > 0 and new_ms > old_ms * (1 + tolerance):
+            regressions.append(f"{case_key(case)}: {old_ms:.2f} ms -> {new_ms:.2f} ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Aquarium simulation/rendering scaling benchmark")
+    parser.add_argument("--engine", nargs="+", default=["objects"], choices=("objects", "swarm", "parallel"))
+    parser.add_argument("--workers", nargs="+", type=int, default=[os.cpu_count() or 1],
+                        help="worker counts to sweep for the parallel engine")
+    parser.add_argument("--lod-budget", type=float,
+                        help="objects engine only: behavior-update milliseconds per tick, enables LOD updates")
+    parser.add_argument("--counts", nargs="+", type=int, default=list(DEFAULT_COUNTS))
+    parser.add_argument("--sizes", nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--densities", nargs="+", default=list(DEFAULT_DENSITIES), choices=DEFAULT_DENSITIES)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--sprite", default="assets/input/fish.jpg")
+    parser.add_argument("--case-timeout", type=float, default=300,
+                        help="seconds before a case is abandoned; larger counts in its series are skipped")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed slowdown vs baseline")
+    parser.add_argument("--single", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        result = run_case(args.engine[0], args.counts[0], args.sizes[0], args.densities[0],
+                          args.frames, args.sprite, workers=args.workers[0],
+                          lod_budget_ms=args.lod_budget)
+        print(json.dumps(result))
+        return 0
+
+    import numpy
+    import pygame
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "numpy": numpy.__version__,
+            "machine": platform.machine(),
+            "frames": args.frames,
+        },
+        "cases": [],
+    }
+    # Parallel runs are swept over worker counts to show how the step scales with cores
+    engines = [(engine, workers) for engine in args.engine
+               for workers in (args.workers if engine == "parallel" else [None])]
+    for engine, workers in engines:
+        for density in args.densities:
+            for size in args.sizes:
+                for fish_count in sorted(args.counts):
+                    case = _run_isolated(args, engine, fish_count, size, density, workers)
+                    if case is None:
+                        print(f"{engine}/{density}/{size}/{fish_count}: timed out or failed, "
+                              f"skipping larger counts")
+                        break
+                    results["cases"].append(case)
+                    stages = case["stages"]
+                    print(f"{case_key(case):40s} total {stages['total']['mean_ms']:9.2f} ms  "
+                          f"sim {stages['simulate']['mean_ms']:8.2f}  vis {stages['visuals']['mean_ms']:8.2f}  "
+                          f"draw {stages['draw']['mean_ms']:8.2f}  alloc {case['alloc_kb_per_frame']:8.1f} KB  "
+                          f"rss {case['peak_rss_mb']:.0f} MB")
+                    if case["lod_full_per_frame"] is not None:
+                        print(f"{'':40s} full behavior updates {case['lod_full_per_frame']:.0f}/{case['fish']} per tick"
+                              + (f", {case['lod_over_budget_frames']} frames over budget"
+                                 if case.get('lod_over_budget_frames') else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
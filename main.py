@@ -1,8 +1,10 @@
+from src.startup import StartupProfiler
+startup = StartupProfiler()
+
 import asyncio
 import platform
-from src.image_processor import remove_white_background
-from src.animation import run_animation, create_demo_aquarium
 import os
+from src.asset_cache import ProcessedAssetCache
 
 async def main():
     """Main function with error handling and demo options"""
@@ -28,24 +30,21 @@ async def main():
     
     print(f"🔄 Processing image: {input_path}")
     
-    # Process image with multiple threshold attempts
-    success = False
+    # Processed sprites are cached by content, so OpenCV only runs when the photo changes
     thresholds = [240, 220, 200, 180, 160]
-    
-    for threshold in thresholds:
-        print(f"Trying threshold: {threshold}")
-        if platform.system() != "Emscripten" and remove_white_background(input_path, output_path, threshold=threshold):
-            success = True
-            print(f"✅ Successfully processed with threshold {threshold}")
-            break
-        elif platform.system() == "Emscripten":
-            # Assume image is preprocessed for Pyodide
-            success = True
-            break
+    if platform.system() == "Emscripten":
+        # Assume image is preprocessed for Pyodide
+        success = True
+    else:
+        with startup.stage("sprite preprocessing"):
+            success = ProcessedAssetCache().process(input_path, output_path, thresholds) is not None
     
     if success:
         print(f"✅ Transparent image created: {output_path}")
         print("\nStarting animation...")
+        # pygame (and the numpy it pulls in) loads only once we know there is something to show
+        with startup.stage("import pygame"):
+            from src.animation import run_animation, create_demo_aquarium
         
         # Ask user for demo preference
         print("\nSelect mode:")
@@ -54,32 +53,34 @@ async def main():
         print("3. Custom - Specify number of fish")
         
         try:
-            choice = input("\nChoice (1/2/3): ").strip()
+            with startup.user_wait():
+                choice = input("\nChoice (1/2/3): ").strip()
             
             if choice == "1":
                 print("🌊 Running Standard Aquarium...")
-                await run_animation(background_path, output_path, fish_count=5)
+                await run_animation(background_path, output_path, fish_count=5, startup=startup)
             elif choice == "2":
                 print("🌊 Running Advanced Demo...")
-                await create_demo_aquarium(output_path, background_path)
+                await create_demo_aquarium(output_path, background_path, startup=startup)
             elif choice == "3":
-                fish_count_input = input("Enter number of fish (1-20): ").strip()
+                with startup.user_wait():
+                    fish_count_input = input("Enter number of fish (1-20): ").strip()
                 try:
                     fish_count = int(fish_count_input)
                     fish_count = max(1, min(20, fish_count))
                     print(f"🌊 Running aquarium with {fish_count} fish...")
-                    await run_animation(background_path, output_path, fish_count=fish_count)
+                    await run_animation(background_path, output_path, fish_count=fish_count, startup=startup)
                 except ValueError:
                     print("⚠️ Invalid number, running default mode...")
-                    await run_animation(background_path, output_path, fish_count=5)
+                    await run_animation(background_path, output_path, fish_count=5, startup=startup)
             else:
                 print("🌊 Invalid choice, running default mode...")
-                await run_animation(background_path, output_path, fish_count=5)
+                await run_animation(background_path, output_path, fish_count=5, startup=startup)
                 
         except (ValueError, KeyboardInterrupt) as e:
             print(f"⚠️ Error: {e}")
             print("🌊 Running default mode...")
-            await run_animation(background_path, output_path, fish_count=5)
+            await run_animation(background_path, output_path, fish_count=5, startup=startup)
     else:
         print("❌ Failed to process image with all thresholds.")
         print("Try:")
@@ -1,77 +1,211 @@
 #animation.py
-import asyncio
+import math
+import os
 import platform
+import time
 import pygame
 from src.sprite_manager import SpriteManager
+from src.profiler import FrameProfiler
+from src.dirty_rect import DirtyRectRenderer
+from src.scheduler import FixedStepScheduler
+from src.startup import StartupProfiler
+from src.lod import LODScheduler
+from src.camera import Camera
 
-async def run_animation(background_path, sprite_path, fish_count=5):
-    """Main animation function with realistic fish behavior"""
-    pygame.init()
-    WIDTH, HEIGHT = 800, 600
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Realistic Fish Aquarium - Ultra Natural Swimming")
+# Arrow-key scrolling speed in screen pixels per second
+CAMERA_PAN_SPEED = 600
+
+def _init_display(width, height, caption, headless=False):
+    if headless:
+        # Render offscreen; only takes effect if the display isn't initialized yet
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    # Only the subsystems the aquarium uses; pygame.init() would also start audio and joysticks
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(caption)
+    return screen
+
+def _make_scheduler(sim_rate, max_fps, recorder=None):
+    if recorder is None:
+        return FixedStepScheduler(sim_rate, max_fps)
+    # Video time drives the simulation, one video frame per rendered frame.
+    # Headless recordings don't pace at all and run faster than real time; a
+    # window paces at the video rate, so the recording plays back at the
+    # speed it was watched
+    return FixedStepScheduler(sim_rate, 0 if recorder.headless else recorder.fps,
+                              max_steps_per_frame=math.ceil(sim_rate / recorder.fps) + 1,
+                              clock=recorder.clock)
+
+def _attach_lod(sprite_manager, lod_budget_ms):
+    # With a budget, crowded tanks only run full behavior on part of the school each tick
+    if lod_budget_ms:
+        sprite_manager.lod = LODScheduler(lod_budget_ms)
+    return sprite_manager.lod
+
+def _make_camera(width, height, world_size):
+    # A world bigger than the window gets a scrollable, zoomable view
+    if not world_size:
+        return None
+    return Camera(width, height, *world_size)
+
+def _world_pos(camera, pos):
+    return camera.to_world(*pos) if camera else pos
+
+def _camera_event(camera, event):
+    """Mouse wheel or +/- zoom; returns True if the event was used"""
+    if camera is None:
+        return False
+    if event.type == pygame.MOUSEWHEEL:
+        camera.zoom_at(event.y, *pygame.mouse.get_pos())
+        return True
+    if event.type == pygame.KEYDOWN and event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS,
+                                                      pygame.K_MINUS, pygame.K_KP_MINUS):
+        steps = -1 if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS) else 1
+        camera.zoom_at(steps, camera.view_width / 2, camera.view_height / 2)
+        return True
+    return False
+
+def _pan_camera(camera, seconds):
+    if camera is None:
+        return
+    keys = pygame.key.get_pressed()
+    dx = keys[pygame.K_RIGHT] - keys[pygame.K_LEFT]
+    dy = keys[pygame.K_DOWN] - keys[pygame.K_UP]
+    if dx or dy:
+        camera.pan(dx * CAMERA_PAN_SPEED * seconds, dy * CAMERA_PAN_SPEED * seconds)
+
+def _lod_focus(lod, camera=None):
+    # Fish under the cursor are the ones being watched, keep them at full detail
+    if lod is not None:
+        lod.focus = _world_pos(camera, pygame.mouse.get_pos()) if pygame.mouse.get_focused() else None
+
+def _add_fish(sprite_manager, sprite_path, x=None, y=None):
+    fish = sprite_manager.add_fish(sprite_path, x, y)
+    if sprite_manager.lod is not None:
+        sprite_manager.lod.boost(fish)
+    return fish
+
+async def run_animation(background_path, sprite_path, fish_count=5, dirty_rects=False,
+                        sim_rate=60, max_fps=60, startup=None, recorder=None, lod_budget_ms=None,
+                        world_size=None):
+    """
+    Main animation function with realistic fish behavior, recorded to video if
+    a recorder is given. A world_size larger than the window is explored with
+    a scrolling, zooming camera; the background stays fixed behind it.
+    """
+    startup = startup or StartupProfiler()
+    WIDTH, HEIGHT = (recorder.width, recorder.height) if recorder else (800, 600)
+    with startup.stage("display init"):
+        screen = _init_display(WIDTH, HEIGHT, "Realistic Fish Aquarium - Ultra Natural Swimming",
+                               recorder is not None and recorder.headless)
     
     # Load and scale background
-    try:
-        if platform.system() != "Emscripten" and background_path:
-            background = pygame.image.load(background_path).convert()
-            background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-        else:
-            # Create default blue water background
+    with startup.stage("background load"):
+        try:
+            if platform.system() != "Emscripten" and background_path:
+                background = pygame.image.load(background_path).convert()
+                background = pygame.transform.scale(background, (WIDTH, HEIGHT))
+            else:
+                # Create default blue water background
+                background = pygame.Surface((WIDTH, HEIGHT))
+                background.fill((20, 60, 120))
+        except Exception as e:
+            print(f"Failed to load background: {e}")
             background = pygame.Surface((WIDTH, HEIGHT))
             background.fill((20, 60, 120))
-    except Exception as e:
-        print(f"Failed to load background: {e}")
-        background = pygame.Surface((WIDTH, HEIGHT))
-        background.fill((20, 60, 120))
     
-    # Create sprite manager
-    sprite_manager = SpriteManager(WIDTH, HEIGHT)
+    # Create sprite manager, the world is the window unless a bigger one was asked for
+    camera = _make_camera(WIDTH, HEIGHT, world_size)
+    sprite_manager = SpriteManager(*(world_size or (WIDTH, HEIGHT)))
+    profiler = FrameProfiler()
+    sprite_manager.profiler = profiler
+    lod = _attach_lod(sprite_manager, lod_budget_ms)
     
     # Create mixed schools for more natural behavior
-    sprite_manager.create_mixed_school(sprite_path, fish_count)
+    with startup.stage("sprite load"):
+        sprite_manager.create_mixed_school(sprite_path, fish_count)
     
-    # Game clock
+    # Game clock only measures FPS, the scheduler paces frames and simulation steps
     clock = pygame.time.Clock()
+    scheduler = _make_scheduler(sim_rate, max_fps, recorder)
+    
+    # Only repaint what the fish moved over when requested (low fill-rate displays)
+    renderer = DirtyRectRenderer(screen, background) if dirty_rects else None
     
     # UI elements
     font = pygame.font.Font(None, 24)
+    profile_font = pygame.font.Font(None, 18)
     show_info = False
+    show_flow = False
     
     print("Aquarium Controls:")
     print("SPACE - Add random fish")
     print("Click - Add fish at mouse position")
     print("R - Reset aquarium")
     print("I - Toggle info display")
+    print("P - Dump frame profile to file")
+    print("F or right click - Drop food")
+    print("C - Toggle water current overlay")
+    if camera:
+        print("Arrows - Scroll, Wheel or +/- - Zoom")
     print("ESC - Exit")
     
     running = True
     while running:
+        events_start = time.perf_counter()
         for event in pygame.event.get():
+            if _camera_event(camera, event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.WINDOWEXPOSED and renderer:
+                renderer.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
-                    sprite_manager.add_fish(sprite_path)
+                    _add_fish(sprite_manager, sprite_path)
                 elif event.key == pygame.K_r:
                     sprite_manager.clear_all_fish()
                     sprite_manager.create_mixed_school(sprite_path, fish_count)
+                elif event.key == pygame.K_c:
+                    show_flow = not show_flow
+                elif event.key == pygame.K_f:
+                    sprite_manager.drop_food(*_world_pos(camera, pygame.mouse.get_pos()))
                 elif event.key == pygame.K_i:
                     show_info = not show_info
+                elif event.key == pygame.K_p:
+                    profiler.dump()
                 elif event.key == pygame.K_ESCAPE:
                     running = False
-            elif event.type == pygame.MOUSEBUTTONDOWN:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
-                sprite_manager.add_fish(sprite_path, mouse_x, mouse_y)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+                mouse_x, mouse_y = _world_pos(camera, pygame.mouse.get_pos())
+                if event.button == 3:
+                    sprite_manager.drop_food(mouse_x, mouse_y)
+                else:
+                    _add_fish(sprite_manager, sprite_path, mouse_x, mouse_y)
+        profiler.add('events', time.perf_counter() - events_start)
+        _pan_camera(camera, clock.get_time() / 1000)
+        _lod_focus(lod, camera)
         
         # Update all sprites
-        sprite_manager.update_sprites()
+        # Fixed-rate simulation, fish move at the same speed whatever the frame rate
+        for _ in range(scheduler.advance()):
+            sprite_manager.simulate()
+        sprite_manager.update_visuals(camera)
         
         # Draw everything
-        screen.blit(background, (0, 0))
-        sprite_manager.draw_sprites(screen)
+        with profiler.stage('draw'):
+            if renderer:
+                renderer.begin_frame()
+            else:
+                screen.blit(background, (0, 0))
+            sprite_rects = sprite_manager.draw_sprites(screen, scheduler.alpha, camera)
         
         # Display information if enabled
+        overlay_start = time.perf_counter()
+        overlay_rects = []
+        if show_flow:
+            overlay_rects += sprite_manager.flow.draw(screen, camera)
         if show_info:
             fps = clock.get_fps()
             fish_count_current = sprite_manager.get_fish_count()
@@ -79,7 +213,16 @@ async def run_animation(background_path, sprite_path, fish_count=5):
             info_texts = [
                 f"FPS: {fps:.1f}",
                 f"Fish Count: {fish_count_current}",
-                f"Controls: SPACE=Add Fish, R=Reset, I=Info"
+                f"Food: {len(sprite_manager.food)} pellets, {sprite_manager.food.eaten} eaten",
+            ]
+            if lod is not None:
+                lod_stats = lod.stats()
+                info_texts.append(f"LOD: {lod_stats['full']} full / {lod_stats['reduced']} reduced"
+                                  + (" (over budget)" if lod_stats['over_budget'] else ""))
+            if camera is not None:
+                info_texts.append(f"View: {camera.x:.0f},{camera.y:.0f} at {camera.zoom:.2f}x")
+            info_texts += [
+                f"Controls: SPACE=Add Fish, R=Reset, I=Info, F=Food, C=Currents, P=Dump Profile"
             ]
             
             for i, text in enumerate(info_texts):
@@ -92,77 +235,151 @@ async def run_animation(background_path, sprite_path, fish_count=5):
                 pygame.draw.rect(screen, (0, 0, 0, 128), bg_rect)
                 
                 screen.blit(text_surface, text_rect)
+                overlay_rects.append(bg_rect)
+            
+            overlay_rects.append(profiler.draw_overlay(screen, profile_font))
+        profiler.add('overlay', time.perf_counter() - overlay_start)
         
-        pygame.display.flip()
-        clock.tick(60)
-        await asyncio.sleep(1.0 / 60)
+        with profiler.stage('flip'):
+            if renderer:
+                renderer.present(sprite_rects, overlay_rects)
+            else:
+                pygame.display.flip()
+        profiler.end_frame()
+        startup.first_frame()
+        if recorder:
+            recorder.capture(screen)
+            running = running and not recorder.done
+        clock.tick()
+        await scheduler.pace()
     
     pygame.quit()
+    if recorder:
+        recorder.close()
 
-async def create_demo_aquarium(sprite_path, background_path=None):
-    """Create advanced demo with multiple fish behaviors"""
-    pygame.init()
-    WIDTH, HEIGHT = 1200, 800
-    screen = pygame.display.set_mode((WIDTH, HEIGHT))
-    pygame.display.set_caption("Advanced Fish Behavior Demo")
+async def create_demo_aquarium(sprite_path, background_path=None, dirty_rects=False,
+                               sim_rate=60, max_fps=60, startup=None, recorder=None, lod_budget_ms=None,
+                               world_size=None):
+    """Create advanced demo with multiple fish behaviors, recorded to video if a recorder is given"""
+    startup = startup or StartupProfiler()
+    WIDTH, HEIGHT = (recorder.width, recorder.height) if recorder else (1200, 800)
+    with startup.stage("display init"):
+        screen = _init_display(WIDTH, HEIGHT, "Advanced Fish Behavior Demo",
+                               recorder is not None and recorder.headless)
     
     # Create enhanced background
-    if platform.system() != "Emscripten" and background_path:
-        try:
-            background = pygame.image.load(background_path).convert()
-            background = pygame.transform.scale(background, (WIDTH, HEIGHT))
-        except Exception as e:
-            print(f"Failed to load background: {e}")
+    with startup.stage("background load"):
+        if platform.system() != "Emscripten" and background_path:
+            try:
+                background = pygame.image.load(background_path).convert()
+                background = pygame.transform.scale(background, (WIDTH, HEIGHT))
+            except Exception as e:
+                print(f"Failed to load background: {e}")
+                background = None
+        else:
             background = None
-    else:
-        background = None
-    
-    if not background:
-        background = pygame.Surface((WIDTH, HEIGHT))
-        for y in range(HEIGHT):
-            ratio = y / HEIGHT
-            blue = int(20 + ratio * 40)
-            green = int(40 + ratio * 20)
-            color = (10, green, blue)
-            pygame.draw.line(background, color, (0, y), (WIDTH, y))
+        
+        if not background:
+            background = pygame.Surface((WIDTH, HEIGHT))
+            for y in range(HEIGHT):
+                ratio = y / HEIGHT
+                blue = int(20 + ratio * 40)
+                green = int(40 + ratio * 20)
+                color = (10, green, blue)
+                pygame.draw.line(background, color, (0, y), (WIDTH, y))
     
-    # Create sprite manager
-    sprite_manager = SpriteManager(WIDTH, HEIGHT)
+    # Create sprite manager, the world is the window unless a bigger one was asked for
+    camera = _make_camera(WIDTH, HEIGHT, world_size)
+    sprite_manager = SpriteManager(*(world_size or (WIDTH, HEIGHT)))
     
     # Create multiple diverse schools
-    sprite_manager.create_school(sprite_path, count=6, center_x=200, center_y=200)
-    sprite_manager.create_school(sprite_path, count=4, center_x=800, center_y=300)
-    sprite_manager.create_school(sprite_path, count=5, center_x=600, center_y=600)
-    sprite_manager.create_mixed_school(sprite_path, total_count=10)
+    with startup.stage("sprite load"):
+        sprite_manager.create_school(sprite_path, count=6, center_x=200, center_y=200)
+        sprite_manager.create_school(sprite_path, count=4, center_x=800, center_y=300)
+        sprite_manager.create_school(sprite_path, count=5, center_x=600, center_y=600)
+        sprite_manager.create_mixed_school(sprite_path, total_count=10)
+    profiler = FrameProfiler()
+    sprite_manager.profiler = profiler
+    lod = _attach_lod(sprite_manager, lod_budget_ms)
     
     clock = pygame.time.Clock()
+    scheduler = _make_scheduler(sim_rate, max_fps, recorder)
     font = pygame.font.Font(None, 36)
+    profile_font = pygame.font.Font(None, 18)
+    show_profile = False
+    show_flow = False
+    renderer = DirtyRectRenderer(screen, background) if dirty_rects else None
     
     running = True
     while running:
+        events_start = time.perf_counter()
         for event in pygame.event.get():
+            if _camera_event(camera, event):
+                continue
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.WINDOWEXPOSED and renderer:
+                renderer.invalidate()
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     running = False
                 elif event.key == pygame.K_SPACE:
-                    sprite_manager.add_fish(sprite_path)
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    mouse_x, mouse_y = pygame.mouse.get_pos()
-                    sprite_manager.add_fish(sprite_path, mouse_x, mouse_y)
+                    _add_fish(sprite_manager, sprite_path)
+                elif event.key == pygame.K_c:
+                    show_flow = not show_flow
+                elif event.key == pygame.K_f:
+                    sprite_manager.drop_food(*_world_pos(camera, pygame.mouse.get_pos()))
+                elif event.key == pygame.K_i:
+                    show_profile = not show_profile
+                elif event.key == pygame.K_p:
+                    profiler.dump()
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (1, 2, 3):
+                mouse_x, mouse_y = _world_pos(camera, pygame.mouse.get_pos())
+                if event.button == 3:
+                    sprite_manager.drop_food(mouse_x, mouse_y)
+                else:
+                    _add_fish(sprite_manager, sprite_path, mouse_x, mouse_y)
+        profiler.add('events', time.perf_counter() - events_start)
+        _pan_camera(camera, clock.get_time() / 1000)
+        _lod_focus(lod, camera)
         
-        sprite_manager.update_sprites()
+        # Fixed-rate simulation, fish move at the same speed whatever the frame rate
+        for _ in range(scheduler.advance()):
+            sprite_manager.simulate()
+        sprite_manager.update_visuals(camera)
         
-        screen.blit(background, (0, 0))
-        sprite_manager.draw_sprites(screen)
+        with profiler.stage('draw'):
+            if renderer:
+                renderer.begin_frame()
+            else:
+                screen.blit(background, (0, 0))
+            sprite_rects = sprite_manager.draw_sprites(screen, scheduler.alpha, camera)
         
-        fps = clock.get_fps()
-        info_text = font.render(f"Advanced Fish Demo - FPS: {fps:.1f} - Fish: {sprite_manager.get_fish_count()}", True, (255, 255, 255))
-        screen.blit(info_text, (10, 10))
+        with profiler.stage('overlay'):
+            fps = clock.get_fps()
+            info = f"Advanced Fish Demo - FPS: {fps:.1f} - Fish: {sprite_manager.get_fish_count()}"
+            if lod is not None:
+                info += f" - Full: {lod.last_full}"
+            info_text = font.render(info, True, (255, 255, 255))
+            overlay_rects = [screen.blit(info_text, (10, 10))]
+            if show_flow:
+                overlay_rects += sprite_manager.flow.draw(screen, camera)
+            if show_profile:
+                overlay_rects.append(profiler.draw_overlay(screen, profile_font))
         
-        pygame.display.flip()
-        clock.tick(60)
-        await asyncio.sleep(1.0 / 60)
+        with profiler.stage('flip'):
+            if renderer:
+                renderer.present(sprite_rects, overlay_rects)
+            else:
+                pygame.display.flip()
+        profiler.end_frame()
+        startup.first_frame()
+        if recorder:
+            recorder.capture(screen)
+            running = running and not recorder.done
+        clock.tick()
+        await scheduler.pace()
     
-    pygame.quit()
\ No newline at end of file
+    pygame.quit()
+    if recorder:
+        recorder.close()
\ No newline at end of file
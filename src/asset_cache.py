@@ -0,0 +1,163 @@
+#asset_cache.py
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = "assets/cache"
+# Same as image_processor.DEFAULT_THRESHOLDS, repeated so lookups never import OpenCV
+DEFAULT_THRESHOLDS = (240, 220, 200, 180, 160)
+_PROCESSOR_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_processor.py")
+_code_version = None
+
+def code_version():
+    """Hash of the image processor source, so editing the pipeline invalidates old entries"""
+    global _code_version
+    if _code_version is None:
+        try:
+            with open(_PROCESSOR_SOURCE, "rb") as f:
+                _code_version = hashlib.sha256(f.read()).hexdigest()[:16]
+        except OSError:
+            _code_version = "unknown"
+    return _code_version
+
+def _atomic_write(path, data):
+    # Write beside the target and rename, so readers never see a partial file
+    directory = os.path.dirname(path) or "."
+    descriptor, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class ProcessedAssetCache:
+    """
+    Content-addressed store of background-removed sprites. Entries are keyed
+    by the input bytes, the processing parameters and the processor version,
+    and the least recently used ones are evicted past max_bytes. Lookups
+    never import OpenCV.
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, input_path, thresholds=DEFAULT_THRESHOLDS):
+        digest = hashlib.sha256()
+        with open(input_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        params = {'thresholds': [int(t) for t in thresholds], 'code_version': code_version()}
+        digest.update(json.dumps(params, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def lookup(self, input_path, thresholds=DEFAULT_THRESHOLDS):
+        """Cached PNG path for this input, or None"""
+        try:
+            png_path, meta_path = self._paths(self.key(input_path, thresholds))
+        except OSError:
+            return None
+        if not (os.path.exists(png_path) and os.path.exists(meta_path)):
+            self.misses += 1
+            return None
+        # The metadata mtime is the LRU clock
+        os.utime(meta_path)
+        self.hits += 1
+        return png_path
+
+    def metadata(self, png_path):
+        with open(os.path.splitext(png_path)[0] + ".json") as f:
+            return json.load(f)
+
+    def process(self, input_path, output_path=None, thresholds=DEFAULT_THRESHOLDS):
+        """
+        Return the transparent PNG for input_path, running background removal
+        only on a cache miss. The result is copied to output_path if given.
+        """
+        cached = self.lookup(input_path, thresholds)
+        if cached is not None:
+            print(f"⚡ Using cached sprite: {cached}")
+        else:
+            cached = self._build(input_path, thresholds)
+            if cached is None:
+                return None
+        if output_path is not None:
+            os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+            shutil.copyfile(cached, output_path)
+            return output_path
+        return cached
+
+    def _build(self, input_path, thresholds):
+        # Only a miss pays for OpenCV
+        from src.image_processor import remove_white_background_sweep
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        key = self.key(input_path, thresholds)
+        png_path, meta_path = self._paths(key)
+        # OpenCV picks the encoder from the extension, so the temp file must end in .png
+        descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".png")
+        os.close(descriptor)
+        report = {}
+        try:
+            start = time.perf_counter()
+            if not remove_white_background_sweep(input_path, temp_path, thresholds, report):
+                return None
+            elapsed = time.perf_counter() - start
+            os.replace(temp_path, png_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        metadata = dict(report, input=input_path, thresholds=list(thresholds),
+                        code_version=code_version(), seconds=elapsed, created=time.time())
+        _atomic_write(meta_path, json.dumps(metadata, indent=2).encode())
+        self.evict()
+        return png_path
+
+    def entries(self):
+        """(last_used, bytes, key) for every complete entry, oldest first"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+        found = []
+        for name in os.listdir(self.cache_dir):
+            key, extension = os.path.splitext(name)
+            if extension != ".json":
+                continue
+            png_path, meta_path = self._paths(key)
+            try:
+                size = os.path.getsize(png_path) + os.path.getsize(meta_path)
+                found.append((os.path.getmtime(meta_path), size, key))
+            except OSError:
+                continue
+        return sorted(found)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for _, _, key in self.entries():
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,151 @@
+#batch_processor.py
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from src.image_processor import DEFAULT_THRESHOLDS, remove_white_background_sweep, enhance_fish_image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+def collect_images(source):
+    """Image paths from a directory (non-recursive) or a glob pattern, sorted"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths
+                  if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS))
+
+def output_stems(images):
+    """
+    Output name stem for each image: its path relative to the inputs' common
+    folder, so same-named files from different folders land in mirrored
+    subfolders. Files sharing a stem in one folder keep their extension too.
+    """
+    if not images:
+        return []
+    root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in images])
+    stems = [os.path.splitext(os.path.relpath(os.path.abspath(path), root))[0] for path in images]
+    seen = {}
+    for stem in stems:
+        seen[stem] = seen.get(stem, 0) + 1
+    return [f"{stem}_{os.path.splitext(path)[1][1:].lower()}" if seen[stem] > 1 else stem
+            for path, stem in zip(images, stems)]
+
+def _init_worker():
+    # One image per process already uses every core; keep OpenCV from
+    # spawning its own thread pool in each worker on top of that
+    import cv2
+    cv2.setNumThreads(1)
+
+def process_image(job):
+    """Background removal and enhancement for one image, returns its manifest entry"""
+    input_path, output_stem, thresholds, enhance = job
+    os.makedirs(os.path.dirname(output_stem), exist_ok=True)
+    transparent_path = f"{output_stem}_transparent.png"
+    entry = {
+        'input': input_path,
+        'output': None,
+        'enhanced': None,
+        'method': None,
+        'threshold': None,
+        'coverage': None,
+        'score': None,
+        'seconds': 0.0,
+        'error': None,
+    }
+    start = time.perf_counter()
+    # Workers run in parallel, so their per-step prints would interleave;
+    # keep them with the entry instead
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            report = {}
+            # Each worker process already has a core to itself, so no thread pool per image
+            if remove_white_background_sweep(input_path, transparent_path, thresholds, report, max_workers=1):
+                entry.update(report, output=transparent_path)
+            else:
+                entry['error'] = report.get('error', "background removal failed at every threshold")
+            if entry['error'] is None and enhance:
+                enhanced_path = f"{output_stem}_enhanced.png"
+                if enhance_fish_image(transparent_path, enhanced_path):
+                    entry['enhanced'] = enhanced_path
+    except Exception as e:
+        entry['error'] = str(e)
+    entry['seconds'] = time.perf_counter() - start
+    entry['log'] = log.getvalue().splitlines()
+    return entry
+
+def run_batch(source, output_dir, workers=None, thresholds=DEFAULT_THRESHOLDS, enhance=True,
+              manifest_path=None):
+    """
+    Process every image in source across a process pool. Failures are recorded
+    in the manifest and never stop the batch. Returns the manifest dict.
+    """
+    images = collect_images(source)
+    if not images:
+        print(f"⚠️ No images found in {source}")
+        return None
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(images)))
+    if manifest_path is None:
+        manifest_path = os.path.join(output_dir, "manifest.json")
+    print(f"🔄 Processing {len(images)} images with {workers} workers")
+
+    jobs = [(path, os.path.join(output_dir, stem), tuple(thresholds), enhance)
+            for path, stem in zip(images, output_stems(images))]
+    entries = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        # Results arrive as soon as each image finishes, so progress streams
+        for done, entry in enumerate(pool.imap_unordered(process_image, jobs), 1):
+            entries.append(entry)
+            name = os.path.basename(entry['input'])
+            if entry['error'] is None:
+                print(f"[{done}/{len(images)}] ✅ {name}: {entry['method']} @ {entry['threshold']}, "
+                      f"coverage {entry['coverage']:.1%}, {entry['seconds']:.2f}s")
+            else:
+                print(f"[{done}/{len(images)}] ❌ {name}: {entry['error']}")
+    elapsed = time.perf_counter() - start
+
+    entries.sort(key=lambda entry: entry['input'])
+    failed = sum(1 for entry in entries if entry['error'] is not None)
+    manifest = {
+        'source': source,
+        'output_dir': output_dir,
+        'workers': workers,
+        'thresholds': list(thresholds),
+        'processed': len(entries) - failed,
+        'failed': failed,
+        'seconds': elapsed,
+        'images': entries,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"✅ {len(entries) - failed}/{len(entries)} images processed in {elapsed:.1f}s")
+    print(f"📄 Manifest written: {manifest_path}")
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove white backgrounds from a batch of fish photos")
+    parser.add_argument("source", help="input directory or glob pattern, e.g. 'photos/**/*.jpg'")
+    parser.add_argument("--output", default="assets/output/batch")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the CPU count")
+    parser.add_argument("--thresholds", type=int, nargs="+", default=list(DEFAULT_THRESHOLDS))
+    parser.add_argument("--no-enhance", action="store_true", help="skip the CLAHE enhancement pass")
+    parser.add_argument("--manifest", help="manifest path, defaults to <output>/manifest.json")
+    args = parser.parse_args()
+
+    manifest = run_batch(args.source, args.output, args.workers, args.thresholds,
+                         not args.no_enhance, args.manifest)
+    if manifest is None or manifest['failed']:
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#camera.py
+import math
+
+class Camera:
+    """
+    Viewport onto a world that can be larger than the window. (x, y) is the
+    world position of the top-left screen pixel; zoom is screen pixels per
+    world unit. Zoom is kept as an integer level k with zoom = ZOOM_STEP ** k,
+    so it never drifts between levels and each level maps to one cached
+    sprite atlas size.
+    """
+    ZOOM_STEP = 1.25
+
+    def __init__(self, view_width, view_height, world_width, world_height, margin=100, max_zoom=2.0):
+        self.view_width = view_width
+        self.view_height = view_height
+        self.world_width = world_width
+        self.world_height = world_height
+        # Fish this far outside the view still get visual updates, so they
+        # are ready the moment they swim in
+        self.margin = margin
+        # Never show anything outside the world: the lowest level is the first
+        # one that still fills the view
+        fit = max(view_width / world_width, view_height / world_height)
+        self.min_level = math.ceil(math.log(fit, self.ZOOM_STEP) - 1e-9)
+        self.max_level = max(self.min_level, math.floor(math.log(max_zoom, self.ZOOM_STEP) + 1e-9))
+        self.level = max(0, self.min_level)
+        self.x = (world_width - view_width / self.zoom) / 2
+        self.y = (world_height - view_height / self.zoom) / 2
+        self._clamp()
+
+    @property
+    def zoom(self):
+        return self.ZOOM_STEP ** self.level
+
+    @property
+    def min_zoom(self):
+        return self.ZOOM_STEP ** self.min_level
+
+    @property
+    def max_zoom(self):
+        return self.ZOOM_STEP ** self.max_level
+
+    def _clamp(self):
+        self.level = max(self.min_level, min(self.max_level, self.level))
+        self.x = max(0.0, min(self.world_width - self.view_width / self.zoom, self.x))
+        self.y = max(0.0, min(self.world_height - self.view_height / self.zoom, self.y))
+
+    def pan(self, dx, dy):
+        """Scroll by a distance in screen pixels"""
+        self.x += dx / self.zoom
+        self.y += dy / self.zoom
+        self._clamp()
+
+    def zoom_at(self, steps, screen_x, screen_y):
+        """Zoom in (positive steps) or out, keeping the world point under (screen_x, screen_y) fixed"""
+        world_x, world_y = self.to_world(screen_x, screen_y)
+        self.level += int(steps)
+        self._clamp()
+        self.x = world_x - screen_x / self.zoom
+        self.y = world_y - screen_y / self.zoom
+        self._clamp()
+
+    def center_on(self, world_x, world_y):
+        self.x = world_x - self.view_width / self.zoom / 2
+        self.y = world_y - self.view_height / self.zoom / 2
+        self._clamp()
+
+    def to_world(self, screen_x, screen_y):
+        return self.x + screen_x / self.zoom, self.y + screen_y / self.zoom
+
+    def to_screen(self, world_x, world_y):
+        return (world_x - self.x) * self.zoom, (world_y - self.y) * self.zoom
+
+    def visible_bounds(self, margin=None):
+        """World-space (left, top, right, bottom) of the view plus a margin in world units"""
+        margin = self.margin if margin is None else margin
+        return (self.x - margin, self.y - margin,
+                self.x + self.view_width / self.zoom + margin,
+                self.y + self.view_height / self.zoom + margin)
+
+    def sprite_size(self, base_size=80):
+        """Sprite max_size that draws a base_size sprite at the current zoom"""
+        return max(8, int(round(base_size * self.zoom)))
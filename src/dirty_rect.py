@@ -0,0 +1,45 @@
+#dirty_rect.py
+import pygame
+
+class DirtyRectRenderer:
+    """
+    Restores and pushes only the screen regions covered by fish this frame or
+    the last one, falling back to a full flip when that area gets too large
+    """
+    def __init__(self, screen, background, full_redraw_ratio=0.5):
+        self.screen = screen
+        self.background = background
+        self.full_redraw_ratio = full_redraw_ratio
+        self.screen_area = screen.get_width() * screen.get_height()
+        self._previous = []
+        self._full_redraw = True
+        self.full_frames = 0
+        self.partial_frames = 0
+        
+    def invalidate(self):
+        """Repaint and push the whole screen next frame (window exposed, background changed)"""
+        self._full_redraw = True
+        
+    def begin_frame(self):
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self._previous:
+                self.screen.blit(self.background, rect, rect)
+                
+    def present(self, sprite_rects, overlay_rects=()):
+        """Push this frame to the display given the rects returned by draw_sprites and any overlays"""
+        current = [pygame.Rect(rect) for rect in sprite_rects]
+        current.extend(pygame.Rect(rect) for rect in overlay_rects)
+        dirty = self._previous + current
+        dirty_area = sum(rect.width * rect.height for rect in dirty)
+        
+        if self._full_redraw or dirty_area > self.screen_area * self.full_redraw_ratio:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(dirty)
+            self.partial_frames += 1
+        # A frame this busy will be cheaper to repaint with one background blit
+        self._full_redraw = sum(rect.width * rect.height for rect in current) > self.screen_area * self.full_redraw_ratio
+        self._previous = current
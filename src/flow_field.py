@@ -0,0 +1,121 @@
+#flow_field.py
+import math
+import numpy as np
+
+class FlowField:
+    """
+    Water current stored as velocities on a coarse grid of nodes covering the
+    world. Every change_interval ticks a new target pattern is drawn (a
+    steady drift plus a few swirls from a random stream function, so the
+    flow circulates instead of piling up) and each tick the grid eases a
+    little toward it. Fish sample it with bilinear interpolation, every
+    position in one batched call.
+    """
+    def __init__(self, world_width, world_height, rng, cell_size=100, strength=0.15,
+                 change_interval=1800, blend=0.002, swirls=3):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.rng = rng
+        self.cell_size = cell_size
+        self.strength = strength
+        self.change_interval = change_interval
+        self.blend = blend
+        self.swirls = swirls
+        self.columns = int(math.ceil(world_width / cell_size)) + 1
+        self.rows = int(math.ceil(world_height / cell_size)) + 1
+        self.vx = np.zeros((self.rows, self.columns))
+        self.vy = np.zeros((self.rows, self.columns))
+        # Calm water until the first pattern arrives, like the old global current
+        self.target_vx = np.zeros_like(self.vx)
+        self.target_vy = np.zeros_like(self.vy)
+        self.timer = 0
+
+    def _random_pattern(self):
+        rng = self.rng
+        node_y, node_x = np.mgrid[0:self.rows, 0:self.columns] * float(self.cell_size)
+        stream = np.zeros_like(node_x)
+        for _ in range(self.swirls):
+            wavelength_x = self.world_width / rng.uniform(0.5, 2.5)
+            wavelength_y = self.world_height / rng.uniform(0.5, 2.5)
+            stream += rng.uniform(-1, 1) * (np.sin(2 * math.pi * node_x / wavelength_x + rng.uniform(0, 2 * math.pi)) *
+                                            np.sin(2 * math.pi * node_y / wavelength_y + rng.uniform(0, 2 * math.pi)))
+        # Velocity is the curl of the stream function: divergence free
+        gradient_y, gradient_x = np.gradient(stream, self.cell_size)
+        swirl_x, swirl_y = gradient_y, -gradient_x
+        peak = np.hypot(swirl_x, swirl_y).max()
+        if peak > 0:
+            swirl_x *= self.strength / peak
+            swirl_y *= self.strength / peak
+        # Horizontal drift dominates, as in a tank with a filter outlet
+        return (swirl_x + rng.uniform(-0.2, 0.2), swirl_y * 0.5 + rng.uniform(-0.1, 0.1))
+
+    def update(self):
+        self.timer += 1
+        if self.timer > self.change_interval:
+            self.target_vx, self.target_vy = self._random_pattern()
+            self.timer = 0
+        self.vx += (self.target_vx - self.vx) * self.blend
+        self.vy += (self.target_vy - self.vy) * self.blend
+
+    def sample(self, x, y):
+        """Bilinear current at arrays of world positions, returned as (vx, vy) arrays"""
+        grid_x = np.clip(np.asarray(x, dtype=np.float64) / self.cell_size, 0, self.columns - 1)
+        grid_y = np.clip(np.asarray(y, dtype=np.float64) / self.cell_size, 0, self.rows - 1)
+        # The far edge node has no neighbor beyond it, so step back one cell there
+        left = np.minimum(grid_x.astype(np.intp), max(0, self.columns - 2))
+        top = np.minimum(grid_y.astype(np.intp), max(0, self.rows - 2))
+        right = np.minimum(left + 1, self.columns - 1)
+        bottom = np.minimum(top + 1, self.rows - 1)
+        fx = grid_x - left
+        fy = grid_y - top
+        samples = []
+        for grid in (self.vx, self.vy):
+            upper = grid[top, left] + (grid[top, right] - grid[top, left]) * fx
+            lower = grid[bottom, left] + (grid[bottom, right] - grid[bottom, left]) * fx
+            samples.append(upper + (lower - upper) * fy)
+        return samples[0], samples[1]
+
+    def to_meta(self):
+        return {
+            'cell_size': self.cell_size,
+            'vx': self.vx.tolist(),
+            'vy': self.vy.tolist(),
+            'target_vx': self.target_vx.tolist(),
+            'target_vy': self.target_vy.tolist(),
+            'timer': self.timer,
+        }
+
+    def load_meta(self, meta):
+        self.cell_size = meta['cell_size']
+        self.vx = np.array(meta['vx'], dtype=np.float64)
+        self.vy = np.array(meta['vy'], dtype=np.float64)
+        self.target_vx = np.array(meta['target_vx'], dtype=np.float64)
+        self.target_vy = np.array(meta['target_vy'], dtype=np.float64)
+        self.rows, self.columns = self.vx.shape
+        self.timer = meta['timer']
+
+    def load_uniform(self, current_x, current_y, timer=0):
+        """Start from a single tank-wide current, as snapshots from before the flow field stored"""
+        self.vx.fill(current_x)
+        self.vy.fill(current_y)
+        self.target_vx = self.vx.copy()
+        self.target_vy = self.vy.copy()
+        self.timer = timer
+
+    def draw(self, screen, camera=None, scale=120, color=(120, 220, 255)):
+        """Debug overlay: one line per grid node pointing downstream, returns the touched rects"""
+        import pygame
+        zoom = camera.zoom if camera else 1.0
+        visible = screen.get_rect()
+        rects = []
+        for row in range(self.rows):
+            for column in range(self.columns):
+                world_x, world_y = column * self.cell_size, row * self.cell_size
+                start = camera.to_screen(world_x, world_y) if camera else (world_x, world_y)
+                if not visible.collidepoint(start):
+                    continue
+                end = (start[0] + self.vx[row, column] * scale * zoom,
+                       start[1] + self.vy[row, column] * scale * zoom)
+                rects.append(pygame.draw.line(screen, color, start, end))
+                rects.append(pygame.draw.circle(screen, color, start, 2))
+        return rects
@@ -0,0 +1,155 @@
+#food.py
+import math
+import pygame
+
+class FoodParticle:
+    __slots__ = ('x', 'y', 'phase', 'age', 'cell')
+
+    def __init__(self, x, y, phase):
+        self.x = x
+        self.y = y
+        self.phase = phase
+        self.age = 0
+        self.cell = None
+
+class FoodSystem:
+    """
+    Food pellets that sink, settle on the bottom and dissolve unless eaten.
+    Pellets live in a uniform grid that is updated in place as they cross
+    cells or disappear, so nearest-food lookups only visit nearby cells
+    instead of every pellet. Buckets are insertion-ordered dicts, which keeps
+    ties, and therefore replays, deterministic.
+    """
+    def __init__(self, world_width, world_height, cell_size=64, sink_speed=0.4, lifetime=1800, pellet_size=5):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.cell_size = cell_size
+        self.sink_speed = sink_speed
+        self.lifetime = lifetime
+        self.pellet_size = pellet_size
+        self.particles = {}
+        self.cells = {}
+        self.eaten = 0
+        self.dissolved = 0
+        self._pellets = {}
+
+    def __len__(self):
+        return len(self.particles)
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def _place(self, particle):
+        cell = self._cell(particle.x, particle.y)
+        if cell == particle.cell:
+            return
+        if particle.cell is not None:
+            bucket = self.cells[particle.cell]
+            del bucket[particle]
+            if not bucket:
+                del self.cells[particle.cell]
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            bucket = self.cells[cell] = {}
+        bucket[particle] = None
+        particle.cell = cell
+
+    def drop(self, x, y, rng, count=12, spread=25):
+        """Scatter a pinch of food around (x, y)"""
+        for _ in range(count):
+            px = min(max(0.0, x + rng.uniform(-spread, spread)), self.world_width - 1)
+            py = min(max(0.0, y + rng.uniform(-spread / 2, spread / 2)), self.world_height - 1)
+            particle = FoodParticle(px, py, rng.uniform(0, 2 * math.pi))
+            self.particles[particle] = None
+            self._place(particle)
+
+    def remove(self, particle):
+        if particle not in self.particles:
+            return
+        del self.particles[particle]
+        bucket = self.cells[particle.cell]
+        del bucket[particle]
+        if not bucket:
+            del self.cells[particle.cell]
+
+    def consume(self, particle):
+        self.remove(particle)
+        self.eaten += 1
+
+    def clear(self):
+        self.particles.clear()
+        self.cells.clear()
+
+    def update(self):
+        """Advance every pellet one tick; only pellets that change cells touch the grid"""
+        floor = self.world_height - 10
+        expired = []
+        for particle in self.particles:
+            particle.age += 1
+            if particle.age > self.lifetime:
+                expired.append(particle)
+                continue
+            if particle.y < floor:
+                particle.y = min(floor, particle.y + self.sink_speed)
+                # Pellets flutter sideways as they sink
+                particle.x += math.sin(particle.age * 0.05 + particle.phase) * 0.3
+                particle.x = min(max(0.0, particle.x), self.world_width - 1)
+                self._place(particle)
+        for particle in expired:
+            self.remove(particle)
+        self.dissolved += len(expired)
+
+    def nearest(self, x, y, radius):
+        """Closest pellet within radius as (particle, distance), or None"""
+        if not self.particles:
+            return None
+        cell_size = self.cell_size
+        center_x, center_y = self._cell(x, y)
+        best = None
+        best_sq = radius * radius
+        for ring in range(int(radius // cell_size) + 2):
+            # Every cell in this ring is at least (ring - 1) cells away
+            if best is not None and ((ring - 1) * cell_size) ** 2 >= best_sq:
+                break
+            if ring == 0:
+                ring_cells = ((center_x, center_y),)
+            else:
+                ring_cells = [(center_x + dx, center_y + dy) for dx in range(-ring, ring + 1) for dy in (-ring, ring)]
+                ring_cells += [(center_x + dx, center_y + dy) for dx in (-ring, ring) for dy in range(-ring + 1, ring)]
+            for cell in ring_cells:
+                bucket = self.cells.get(cell)
+                if not bucket:
+                    continue
+                for particle in bucket:
+                    distance_sq = (particle.x - x) ** 2 + (particle.y - y) ** 2
+                    if distance_sq < best_sq:
+                        best, best_sq = particle, distance_sq
+        return (best, math.sqrt(best_sq)) if best is not None else None
+
+    def pellet(self, size=None):
+        """Shared pellet surface, one per drawn size"""
+        size = max(2, size or self.pellet_size)
+        surface = self._pellets.get(size)
+        if surface is None:
+            surface = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(surface, (205, 160, 90), (size / 2, size / 2), size / 2)
+            self._pellets[size] = surface
+        return surface
+
+    def to_meta(self):
+        """Pellets as JSON-friendly columns for snapshots"""
+        particles = list(self.particles)
+        return {
+            'x': [p.x for p in particles],
+            'y': [p.y for p in particles],
+            'phase': [p.phase for p in particles],
+            'age': [p.age for p in particles],
+        }
+
+    def load_meta(self, meta):
+        self.clear()
+        for x, y, phase, age in zip(meta['x'], meta['y'], meta['phase'], meta['age']):
+            particle = FoodParticle(x, y, phase)
+            particle.age = age
+            self.particles[particle] = None
+            self._place(particle)
@@ -2,147 +2,241 @@ import cv2
 import numpy as np
 import os
 import platform
+from concurrent.futures import ThreadPoolExecutor
 
-def remove_white_background(input_path="aquatic_sim/assets/input/fish.jpg", output_path="aquatic_sim/assets/output/fish_transparent.png", threshold=240):
+DEFAULT_THRESHOLDS = (240, 220, 200, 180, 160)
+MIN_COVERAGE, MAX_COVERAGE = 0.01, 0.95
+
+def load_image(input_path):
+    """Decode an image once and return it as BGRA"""
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"Image {input_path} not found")
+    
+    img = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise FileNotFoundError(f"Failed to read {input_path}")
+
+    if len(img.shape) == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)
+    elif len(img.shape) == 3 and img.shape[2] == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
+    elif len(img.shape) == 3 and img.shape[2] == 4:
+        pass
+    else:
+        raise ValueError(f"Unsupported image format: {img.shape}")
+    return img
+
+def remove_white_background(input_path="aquatic_sim/assets/input/fish.jpg", output_path="aquatic_sim/assets/output/fish_transparent.png", threshold=240, report=None):
     """
-    Enhanced background removal with multiple techniques
+    Enhanced background removal with multiple techniques.
+    If a report dict is given, the winning method and its mask coverage are recorded in it.
+    """
+    return remove_white_background_sweep(input_path, output_path, (threshold,), report)
+
+def remove_white_background_sweep(input_path, output_path, thresholds=DEFAULT_THRESHOLDS, report=None,
+                                  max_workers=None):
+    """
+    Decode once, score every threshold and the edge and adaptive methods in
+    memory, and encode only the best mask. max_workers is passed on to
+    find_mask_candidates. On failure the reason is stored in report['error'].
     """
     if platform.system() == "Emscripten":
         print("⚠️ Image processing skipped in Pyodide environment")
         return True
     
     try:
-        if not os.path.exists(input_path):
-            raise FileNotFoundError(f"Image {input_path} not found")
-        
-        img = cv2.imread(input_path, cv2.IMREAD_UNCHANGED)
-        if img is None:
-            raise FileNotFoundError(f"Failed to read {input_path}")
-        
+        img = load_image(input_path)
         print(f"Processing image: {input_path}")
         print(f"Image size: {img.shape}")
 
-        if len(img.shape) == 2:
-            img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGRA)
-        elif len(img.shape) == 3 and img.shape[2] == 3:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2BGRA)
-        elif len(img.shape) == 3 and img.shape[2] == 4:
-            pass
-        else:
-            raise ValueError(f"Unsupported image format: {img.shape}")
-
-        success = _remove_by_color_threshold(img, threshold, output_path)
-        if success:
-            return True
-        
-        success = _remove_by_edge_detection(img, output_path)
-        if success:
-            return True
-        
-        success = _remove_by_adaptive_threshold(img, output_path)
-        return success
+        candidates = find_mask_candidates(img, thresholds, max_workers)
+        for candidate in candidates:
+            print(f"{_describe(candidate)}: score {candidate['score']:.3f} "
+                  f"(solidity {candidate['solidity']:.2f}, area {candidate['area_ratio']:.2f}, "
+                  f"edges {candidate['edge_alignment']:.2f}), coverage {candidate['coverage']:.1%}")
+        if not candidates:
+            print("❌ No method found a fish outline")
+            if report is not None:
+                report['error'] = "no method found a fish outline"
+            return False
+
+        best = candidates[0]
+        img[:, :, 3] = best['mask']
+        _save(img, output_path)
+        if report is not None:
+            report.update((key, best[key]) for key in ('method', 'threshold', 'coverage', 'score'))
+        print(f"✅ {_describe(best)} selected: {output_path}")
+        return True
     
     except Exception as e:
         print(f"Error: {str(e)}")
+        if report is not None:
+            report['error'] = str(e)
         return False
 
-def _remove_by_color_threshold(img, threshold, output_path):
+def find_mask_candidates(img, thresholds=DEFAULT_THRESHOLDS, max_workers=None):
+    """
+    Run every color threshold plus the edge and adaptive methods on one
+    decoded image. OpenCV releases the GIL, so by default they run
+    concurrently, one thread per method. max_workers=1 runs them in series,
+    for callers that already keep every core busy, such as batch workers.
+    Returns scored candidates, best first.
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    reference = _scoring_reference(gray)
+    foreground = _foreground_by_threshold(gray)
+    jobs = [(_color_threshold_candidate, gray, threshold, foreground, reference) for threshold in thresholds]
+    jobs.append((_edge_detection_candidate, gray, reference))
+    jobs.append((_adaptive_threshold_candidate, gray, reference))
+    if max_workers is None:
+        max_workers = len(jobs)
+    if max_workers <= 1:
+        candidates = [method(*args) for method, *args in jobs]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(*job) for job in jobs]
+            candidates = [future.result() for future in futures]
+    # Stable sort keeps thresholds ahead of the fallback methods on ties
+    return sorted((c for c in candidates if c is not None), key=lambda c: -c['score'])
+
+def _describe(candidate):
+    if candidate['threshold'] is None:
+        return candidate['method']
+    return f"{candidate['method']} @ {candidate['threshold']}"
+
+def _foreground_by_threshold(gray):
+    # THRESH_BINARY_INV keeps pixels <= threshold, so the cumulative
+    # histogram is the foreground size for every threshold at once
+    return np.cumsum(np.bincount(gray.ravel(), minlength=256))
+
+def _edge_map(gray):
+    """Canny edges the edge method builds its outline from"""
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    return cv2.Canny(blurred, 50, 150)
+
+def _scoring_reference(gray):
+    """
+    What every candidate is scored against, built independently of all the
+    methods so none of them is graded on its own input: strong Sobel
+    gradients of a lightly blurred image (undilated, so an outline drawn
+    beside the real edge misses it) and the pixel count of the filled Otsu
+    foreground.
+    """
+    blurred = cv2.GaussianBlur(gray, (3, 3), 0)
+    magnitude = cv2.magnitude(cv2.Sobel(blurred, cv2.CV_32F, 1, 0), cv2.Sobel(blurred, cv2.CV_32F, 0, 1))
+    magnitude = cv2.convertScaleAbs(magnitude, alpha=255.0 / max(1.0, float(magnitude.max())))
+    _, edges = cv2.threshold(magnitude, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+
+    _, foreground = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(foreground, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    filled = np.zeros(gray.shape, dtype=np.uint8)
+    cv2.drawContours(filled, contours, -1, 255, -1)
+    return edges, np.count_nonzero(filled)
+
+def _candidate(method, mask, contours, reference, threshold=None):
+    """
+    Score a mask 0..1 as the product of contour solidity, how closely its
+    area matches the shared reference foreground, and how much of its
+    outline sits on a reference edge. Masks covering almost nothing or
+    almost everything score 0.
+    """
+    edges, foreground_pixels = reference
+    area = sum(cv2.contourArea(contour) for contour in contours)
+    hull_area = sum(cv2.contourArea(cv2.convexHull(contour)) for contour in contours)
+    solidity = area / hull_area if hull_area > 0 else 0.0
+
+    binary = np.where(mask > 127, 255, 0).astype(np.uint8)
+    mask_pixels = np.count_nonzero(binary)
+    coverage = float(mask_pixels) / binary.size
+    area_ratio = min(mask_pixels, foreground_pixels) / max(mask_pixels, foreground_pixels, 1)
+    kernel = np.ones((3,3), np.uint8)
+    outline = cv2.morphologyEx(binary, cv2.MORPH_GRADIENT, kernel)
+    outline_pixels = np.count_nonzero(outline)
+    alignment = np.count_nonzero(outline & edges) / outline_pixels if outline_pixels else 0.0
+
+    score = solidity * area_ratio * alignment
+    if not MIN_COVERAGE <= coverage <= MAX_COVERAGE:
+        score = 0.0
+    return {
+        'method': method,
+        'threshold': threshold,
+        'score': score,
+        'solidity': solidity,
+        'area_ratio': area_ratio,
+        'edge_alignment': alignment,
+        'coverage': coverage,
+        'mask': mask,
+    }
+
+def _color_threshold_candidate(gray, threshold, foreground, reference):
     """Method 1: Simple color thresholding"""
-    try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
-        _, thresh = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
-        
-        kernel = np.ones((3,3), np.uint8)
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-        thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-        
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if not contours:
-            return False
+    raw_pixels = foreground[min(255, max(0, int(threshold)))]
+    # Thresholds that keep almost nothing or almost everything are not worth the morphology
+    if not MIN_COVERAGE <= raw_pixels / gray.size <= MAX_COVERAGE:
+        return None
+    _, thresh = cv2.threshold(gray, threshold, 255, cv2.THRESH_BINARY_INV)
+    
+    kernel = np.ones((3,3), np.uint8)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
+    
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
 
-        largest_contour = max(contours, key=cv2.contourArea)
-        mask = np.zeros(img.shape[:2], dtype=np.uint8)
-        cv2.drawContours(mask, [largest_contour], -1, 255, -1)
-        
-        mask = cv2.GaussianBlur(mask, (3, 3), 0)
-        img[:, :, 3] = mask
-        
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        cv2.imwrite(output_path, img)
-        print(f"✅ Method 1 succeeded: {output_path}")
-        return True
-        
-    except Exception as e:
-        print(f"Method 1 failed: {e}")
-        return False
+    largest_contour = max(contours, key=cv2.contourArea)
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    cv2.drawContours(mask, [largest_contour], -1, 255, -1)
+    
+    mask = cv2.GaussianBlur(mask, (3, 3), 0)
+    return _candidate('color_threshold', mask, [largest_contour], reference, threshold)
 
-def _remove_by_edge_detection(img, output_path):
+def _edge_detection_candidate(gray, reference):
     """Method 2: Edge detection based removal"""
-    try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-        edges = cv2.Canny(blurred, 50, 150)
-        
-        kernel = np.ones((3,3), np.uint8)
-        edges = cv2.dilate(edges, kernel, iterations=2)
-        
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if not contours:
-            return False
-            
-        largest_contour = max(contours, key=cv2.contourArea)
-        mask = np.zeros(img.shape[:2], dtype=np.uint8)
-        cv2.drawContours(mask, [largest_contour], -1, 255, -1)
-        
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=3)
-        img[:, :, 3] = mask
-        
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        cv2.imwrite(output_path, img)
-        print(f"✅ Method 2 succeeded: {output_path}")
-        return True
+    kernel = np.ones((3,3), np.uint8)
+    edges = cv2.dilate(_edge_map(gray), kernel, iterations=2)
+    
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
         
-    except Exception as e:
-        print(f"Method 2 failed: {e}")
-        return False
+    largest_contour = max(contours, key=cv2.contourArea)
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    cv2.drawContours(mask, [largest_contour], -1, 255, -1)
+    
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=3)
+    return _candidate('edge_detection', mask, [largest_contour], reference)
 
-def _remove_by_adaptive_threshold(img, output_path):
+def _adaptive_threshold_candidate(gray, reference):
     """Method 3: Adaptive thresholding"""
-    try:
-        gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
-        adaptive_thresh = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-            cv2.THRESH_BINARY_INV, 11, 2
-        )
-        
-        kernel = np.ones((5,5), np.uint8)
-        adaptive_thresh = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_CLOSE, kernel)
-        adaptive_thresh = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_OPEN, kernel)
-        
-        contours, _ = cv2.findContours(adaptive_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        if not contours:
-            return False
-            
-        min_area = img.shape[0] * img.shape[1] * 0.01
-        valid_contours = [c for c in contours if cv2.contourArea(c) > min_area]
-        
-        if not valid_contours:
-            return False
-            
-        mask = np.zeros(img.shape[:2], dtype=np.uint8)
-        cv2.drawContours(mask, valid_contours, -1, 255, -1)
-        
-        mask = cv2.GaussianBlur(mask, (5, 5), 0)
-        img[:, :, 3] = mask
+    adaptive_thresh = cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
+        cv2.THRESH_BINARY_INV, 11, 2
+    )
+    
+    kernel = np.ones((5,5), np.uint8)
+    adaptive_thresh = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_CLOSE, kernel)
+    adaptive_thresh = cv2.morphologyEx(adaptive_thresh, cv2.MORPH_OPEN, kernel)
+    
+    contours, _ = cv2.findContours(adaptive_thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
         
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        cv2.imwrite(output_path, img)
-        print(f"✅ Method 3 succeeded: {output_path}")
-        return True
+    min_area = gray.shape[0] * gray.shape[1] * 0.01
+    valid_contours = [c for c in contours if cv2.contourArea(c) > min_area]
+    
+    if not valid_contours:
+        return None
         
-    except Exception as e:
-        print(f"Method 3 failed: {e}")
-        return False
+    mask = np.zeros(gray.shape, dtype=np.uint8)
+    cv2.drawContours(mask, valid_contours, -1, 255, -1)
+    
+    mask = cv2.GaussianBlur(mask, (5, 5), 0)
+    return _candidate('adaptive_threshold', mask, valid_contours, reference)
+
+def _save(img, output_path):
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    cv2.imwrite(output_path, img)
 
 def enhance_fish_image(input_path, output_path=None):
     """
@@ -0,0 +1,128 @@
+#lod.py
+import math
+
+class LODScheduler:
+    """
+    Decides each frame which fish get the full behavior update and which only
+    integrate physics. The budget covers the behavior share alone, the
+    learned difference between a full and a reduced update; physics runs for
+    every fish regardless, so it is not charged against the budget. Priority
+    tiers fill the budget first (fish boosted after an interaction, then fish
+    near the focus point) and everyone else takes turns round-robin in
+    whatever is left, so frame time stays flat as the population grows.
+    Setting min_refresh guarantees that share of the school a full update
+    each frame, so no fish goes more than 1 / min_refresh frames without
+    one, even when that overruns the budget; stats() reports when it does.
+    """
+    def __init__(self, budget_ms=4.0, focus_radius=150, boost_frames=120, min_full=1, min_refresh=0.0,
+                 smoothing=0.1):
+        self.budget = budget_ms / 1000
+        self.focus = None
+        self.focus_radius = focus_radius
+        self.boost_frames = boost_frames
+        self.min_full = min_full
+        self.min_refresh = min_refresh
+        self.smoothing = smoothing
+        # Seconds per fish, refined from every frame's measurements
+        self.full_cost = 50e-6
+        self.reduced_cost = 10e-6
+        self.frame = 0
+        self.capacity = 0
+        self.over_budget = False
+        self.last_full = 0
+        self.last_reduced = 0
+        self.total_full = 0
+        self.total_reduced = 0
+        self._cursor = 0
+        self._boosted = {}
+
+    def boost(self, fish, frames=None):
+        """Keep a fish at full detail for a while, e.g. after the user interacts with it"""
+        self._boosted[fish] = self.frame + (frames if frames is not None else self.boost_frames)
+
+    def forget(self, fish=None):
+        """Drop a removed fish's boost, or every boost when fish is None"""
+        if fish is None:
+            self._boosted.clear()
+        else:
+            self._boosted.pop(fish, None)
+
+    def _tiers(self, spatial_index):
+        """Priority tiers, most important first: boosted fish, then fish near the focus"""
+        boosted = []
+        for fish, until in list(self._boosted.items()):
+            if until < self.frame:
+                del self._boosted[fish]
+            else:
+                boosted.append(fish)
+        near = []
+        if self.focus is not None and spatial_index is not None:
+            near = [fish for fish, _ in spatial_index.query(self.focus[0], self.focus[1], self.focus_radius)]
+        return boosted, near
+
+    def plan(self, fish_list, spatial_index=None):
+        """Split fish_list into (full, reduced) update lists for this frame"""
+        self.frame += 1
+        count = len(fish_list)
+        # Each full update replaces a reduced one, so only the difference eats into the budget
+        extra_cost = max(1e-7, self.full_cost - self.reduced_cost)
+        affordable = int(self.budget / extra_cost)
+        floor = max(self.min_full, math.ceil(count * self.min_refresh))
+        self.capacity = min(count, max(floor, affordable))
+        # The refresh floor wins over the budget, but not silently
+        self.over_budget = self.capacity > affordable
+        if self.capacity >= count:
+            return fish_list, []
+
+        chosen = {}
+        for tier in self._tiers(spatial_index):
+            room = self.capacity - len(chosen)
+            if room <= 0:
+                break
+            if len(tier) > room:
+                # Not enough budget for the whole tier, rotate through it
+                offset = (self.frame * room) % len(tier)
+                tier = (tier[offset:] + tier[:offset])[:room]
+            chosen.update(dict.fromkeys(tier))
+
+        wanted = self.capacity - len(chosen)
+        if wanted > 0:
+            start = self._cursor % count
+            scanned = 0
+            for fish in fish_list[start:] + fish_list[:start]:
+                if wanted <= 0:
+                    break
+                scanned += 1
+                if fish not in chosen:
+                    chosen[fish] = None
+                    wanted -= 1
+            self._cursor = (start + scanned) % count
+
+        reduced = [fish for fish in fish_list if fish not in chosen]
+        return list(chosen), reduced
+
+    def record(self, full_count, full_seconds, reduced_count, reduced_seconds):
+        """Feed back how long this frame's updates took"""
+        if full_count:
+            self.full_cost += (full_seconds / full_count - self.full_cost) * self.smoothing
+        if reduced_count:
+            self.reduced_cost += (reduced_seconds / reduced_count - self.reduced_cost) * self.smoothing
+        self.last_full = full_count
+        self.last_reduced = reduced_count
+        self.total_full += full_count
+        self.total_reduced += reduced_count
+
+    def stats(self):
+        population = self.last_full + self.last_reduced
+        return {
+            'full': self.last_full,
+            'reduced': self.last_reduced,
+            'capacity': self.capacity,
+            'over_budget': self.over_budget,
+            'full_cost_us': self.full_cost * 1e6,
+            'reduced_cost_us': self.reduced_cost * 1e6,
+            # Frames between full updates for a fish outside the priority tier
+            'refresh_frames': math.ceil(population / self.last_full) if self.last_full else None,
+            'total_full': self.total_full,
+            'total_reduced': self.total_reduced,
+        }
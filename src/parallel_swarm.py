@@ -0,0 +1,197 @@
+#parallel_swarm.py
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from src.swarm_engine import SwarmEngine
+from src.swarm_kernels import FIELDS, STATE_RADIUS, step_behavior, step_physics
+
+def _layout(count):
+    offsets = {}
+    offset = 0
+    for name, dtype in FIELDS:
+        # Keep every field 8-byte aligned
+        offsets[name] = offset
+        offset += -(-count * np.dtype(dtype).itemsize // 8) * 8
+    return offsets, max(offset, 8)
+
+def _state_views(buffer, count):
+    offsets, _ = _layout(count)
+    return {name: np.ndarray(count, dtype=dtype, buffer=buffer, offset=offsets[name])
+            for name, dtype in FIELDS}
+
+def _worker_main(connection):
+    """Worker loop: step one strip of fish from the read buffer into the write buffer"""
+    attached = {}
+    def attach(name):
+        if name not in attached:
+            # Spawned workers share the main process's resource tracker, which
+            # owns and unlinks these blocks
+            attached[name] = shared_memory.SharedMemory(name=name)
+        return attached[name]
+
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        if message[0] == 'detach':
+            for name in message[1]:
+                block = attached.pop(name, None)
+                if block is not None:
+                    block.close()
+            continue
+        (_, read_name, write_name, selection_name, count, selection_offset, selection_count,
+         owned_start, owned_stop, width, height, seed, tick, strip) = message
+        read = _state_views(attach(read_name).buf, count)
+        write = _state_views(attach(write_name).buf, count)
+        selection = np.ndarray(selection_count, dtype=np.int64, buffer=attach(selection_name).buf,
+                               offset=selection_offset * 8)
+        local = {name: values[selection] for name, values in read.items()}
+        rng = np.random.default_rng([seed, tick, strip])
+        step_behavior(local, rng, width, height, query=np.arange(owned_start, owned_stop))
+        step_physics(local, width, height)
+        owned = selection[owned_start:owned_stop]
+        for name, values in local.items():
+            write[name][owned] = values[owned_start:owned_stop]
+        del read, write, selection, owned
+        connection.send(strip)
+    for block in attached.values():
+        block.close()
+
+class ParallelSwarmEngine(SwarmEngine):
+    """
+    SwarmEngine whose simulation step runs in worker processes. The tank is cut
+    into one vertical strip per worker, each holding an equal share of fish plus
+    a halo of neighbors within reach of its edges. State lives in
+    double-buffered shared memory, so a frame only sends each worker a small
+    command tuple. Results depend only on the seed and the worker count.
+    """
+    def __init__(self, screen_width=800, screen_height=600, seed=None, workers=None):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 63))
+        self.tick = 0
+        self._blocks = None
+        self._processes = []
+        self._connections = []
+        super().__init__(screen_width, screen_height, self.seed)
+
+    def _start_workers(self):
+        context = multiprocessing.get_context('spawn')
+        for _ in range(self.workers):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker_main, args=(child,), daemon=True)
+            process.start()
+            self._processes.append(process)
+            self._connections.append(parent)
+
+    def _share(self):
+        """Move the state arrays into freshly sized shared memory blocks"""
+        old_blocks = self._blocks
+        count = self.get_fish_count()
+        self._blocks = None
+        if count:
+            _, size = _layout(count)
+            read = shared_memory.SharedMemory(create=True, size=size)
+            write = shared_memory.SharedMemory(create=True, size=size)
+            selection = shared_memory.SharedMemory(create=True, size=self.workers * count * 8)
+            self._blocks = [read, write, selection]
+            views = _state_views(read.buf, count)
+            for name, values in self.arrays.items():
+                views[name][:] = values
+            self.arrays = views
+        if old_blocks:
+            for connection in self._connections:
+                connection.send(('detach', [block.name for block in old_blocks]))
+            self._release(old_blocks)
+
+    def _release(self, blocks):
+        # Views into a block must be dropped before it can close
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                pass
+            block.unlink()
+
+    def _spawn(self, sprite_path, x, y, following_tendency=None, direction=None):
+        views = super()._spawn(sprite_path, x, y, following_tendency, direction)
+        self._share()
+        return views
+
+    def _snapshot_meta(self):
+        meta = super()._snapshot_meta()
+        # Worker streams are seeded from these, so they are part of the state
+        meta['seed'] = self.seed
+        meta['tick'] = self.tick
+        return meta
+
+    def _restore_meta(self, meta, version):
+        super()._restore_meta(meta, version)
+        self.seed = meta['seed']
+        self.tick = meta['tick']
+
+    def load_snapshot(self, path):
+        super().load_snapshot(path)
+        self._share()
+
+    def clear_all_fish(self):
+        super().clear_all_fish()
+        if self._blocks is not None:
+            self._share()
+
+    def _advance(self):
+        if not self._processes:
+            self._start_workers()
+        start = time.perf_counter()
+        self.tick += 1
+        count = self.get_fish_count()
+        read, write, selection_block = self._blocks
+        selection = np.ndarray(self.workers * count, dtype=np.int64, buffer=selection_block.buf)
+
+        x = self.arrays['x']
+        order = np.argsort(x, kind='stable')
+        sorted_x = x[order]
+        reach = max(STATE_RADIUS, float(self.arrays['comfort_distance'].max()))
+        bounds = np.linspace(0, count, self.workers + 1).astype(int)
+        busy = []
+        for strip, connection in enumerate(self._connections):
+            first, last = bounds[strip], bounds[strip + 1]
+            if first == last:
+                continue
+            halo_first = np.searchsorted(sorted_x, sorted_x[first] - reach, 'left')
+            halo_last = np.searchsorted(sorted_x, sorted_x[last - 1] + reach, 'right')
+            offset = strip * count
+            selection[offset:offset + halo_last - halo_first] = order[halo_first:halo_last]
+            connection.send(('step', read.name, write.name, selection_block.name, count, offset,
+                             halo_last - halo_first, first - halo_first, last - halo_first,
+                             self.screen_width, self.screen_height, self.seed, self.tick, strip))
+            busy.append(connection)
+        for connection in busy:
+            connection.recv()
+
+        # Swap buffers: this step's output is next step's input
+        self._blocks = [write, read, selection_block]
+        self.arrays = _state_views(write.buf, count)
+        if self.profiler is not None:
+            self.profiler.add('behavior', time.perf_counter() - start)
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        self._processes, self._connections = [], []
+        if self._blocks:
+            self.arrays = {name: np.array(values) for name, values in self.arrays.items()}
+            self._release(self._blocks)
+            self._blocks = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
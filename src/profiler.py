@@ -0,0 +1,97 @@
+#profiler.py
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+import pygame
+
+FRAME_STAGES = ('events', 'behavior', 'physics', 'visuals', 'draw', 'overlay', 'flip')
+
+class FrameProfiler:
+    """
+    Per-stage frame timings kept in fixed-size ring buffers. Stages add their
+    elapsed time during a frame and end_frame() commits them as one sample.
+    """
+    def __init__(self, capacity=300, budget_ms=1000 / 60):
+        self.capacity = capacity
+        self.budget_ms = budget_ms
+        self.samples = {stage: deque(maxlen=capacity) for stage in FRAME_STAGES}
+        self.totals = deque(maxlen=capacity)
+        self._current = dict.fromkeys(FRAME_STAGES, 0.0)
+
+    def add(self, stage, seconds):
+        self._current[stage] = self._current.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def end_frame(self):
+        total = 0.0
+        for stage, seconds in self._current.items():
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.capacity)
+            self.samples[stage].append(seconds * 1000)
+            total += seconds * 1000
+            self._current[stage] = 0.0
+        self.totals.append(total)
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {'p50': 0.0, 'p95': 0.0, 'p99': 0.0}
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return {name: ordered[min(last, int(fraction * len(ordered)))]
+                for name, fraction in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))}
+
+    def percentiles(self, stage=None):
+        """p50/p95/p99 in milliseconds for one stage, or the whole frame if no stage is given"""
+        return self._percentiles(self.totals if stage is None else self.samples[stage])
+
+    def summary(self):
+        report = {stage: self.percentiles(stage) for stage in self.samples}
+        report['frame'] = self.percentiles()
+        return report
+
+    def dump(self, path=None):
+        if path is None:
+            path = time.strftime("frame_profile_%Y%m%d_%H%M%S.json")
+        with open(path, "w") as f:
+            json.dump({
+                'budget_ms': self.budget_ms,
+                'summary': self.summary(),
+                'samples_ms': {stage: list(values) for stage, values in self.samples.items()},
+                'frame_ms': list(self.totals),
+            }, f, indent=2)
+        print(f"📈 Frame profile written: {path}")
+        return path
+
+    def draw_overlay(self, screen, font, topleft=(10, None), height=80):
+        """Frame time graph with the budget line, plus p50/p95/p99 per stage"""
+        width = self.capacity
+        x, y = topleft
+        if y is None:
+            y = screen.get_height() - height - 20 * (len(self.samples) + 1) - 10
+        panel = pygame.Surface((width + 10, height + 20 * (len(self.samples) + 1) + 10), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 160))
+
+        # Graph scaled so the budget line sits at half height
+        scale = (height / 2) / self.budget_ms
+        budget_y = 5 + height - int(self.budget_ms * scale)
+        for i, total in enumerate(self.totals):
+            bar = min(height, int(total * scale))
+            color = (90, 220, 120) if total <= self.budget_ms else (240, 80, 80)
+            pygame.draw.line(panel, color, (5 + i, 5 + height), (5 + i, 5 + height - bar))
+        pygame.draw.line(panel, (255, 255, 0), (5, budget_y), (5 + width, budget_y))
+
+        lines = [('frame', self.percentiles())] + [(stage, self.percentiles(stage)) for stage in self.samples]
+        for i, (stage, values) in enumerate(lines):
+            text = f"{stage:<9} p50 {values['p50']:5.2f}  p95 {values['p95']:5.2f}  p99 {values['p99']:5.2f} ms"
+            panel.blit(font.render(text, True, (255, 255, 255)), (5, height + 10 + i * 20))
+        screen.blit(panel, (x, y))
+        return pygame.Rect(x, y, panel.get_width(), panel.get_height())
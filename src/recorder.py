@@ -0,0 +1,165 @@
+#recorder.py
+import argparse
+import asyncio
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+class VideoRecorder:
+    """
+    Copies rendered frames into a fixed ring of preallocated buffers and
+    encodes them on a writer thread, so the render loop never waits on the
+    encoder unless the ring is full. When it is, the frame is either dropped
+    (live window) or the loop waits for a free buffer (headless, where
+    nothing runs in real time anyway). clock() is the video timeline,
+    letting the simulation advance exactly one video frame per capture.
+    """
+    def __init__(self, output_path, width=1280, height=720, fps=30, seconds=None,
+                 buffers=8, codec="mp4v", headless=True, block=None):
+        self.output_path = output_path
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frame_limit = int(seconds * fps) if seconds else None
+        self.headless = headless
+        self.block = headless if block is None else block
+        self.codec = codec
+        # Buffers hold surfarray layout (width, height, RGB); the writer
+        # thread does the transpose and channel swap OpenCV wants
+        self._buffers = [np.empty((width, height, 3), dtype=np.uint8) for _ in range(max(1, buffers))]
+        self._free = queue.Queue()
+        for index in range(len(self._buffers)):
+            self._free.put(index)
+        self._filled = queue.Queue()
+        self.frames_offered = 0
+        self.frames_written = 0
+        self.dropped = 0
+        self.backpressured = 0
+        self.backpressure_seconds = 0.0
+        self.error = None
+        self._started = time.perf_counter()
+        self._writer = self._open_writer()
+        self._thread = threading.Thread(target=self._encode, name="video-encoder", daemon=True)
+        self._thread.start()
+
+    def _open_writer(self):
+        import cv2
+        os.makedirs(os.path.dirname(self.output_path) or ".", exist_ok=True)
+        writer = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*self.codec),
+                                 self.fps, (self.width, self.height))
+        if not writer.isOpened():
+            raise RuntimeError(f"Could not open video writer for {self.output_path} ({self.codec})")
+        return writer
+
+    def clock(self):
+        """Seconds of video captured so far, a drop-in clock for FixedStepScheduler"""
+        return self.frames_offered / self.fps
+
+    @property
+    def done(self):
+        return self.frame_limit is not None and self.frames_offered >= self.frame_limit
+
+    def capture(self, surface):
+        """Queue the surface's current pixels for encoding"""
+        self.frames_offered += 1
+        try:
+            index = self._free.get_nowait()
+        except queue.Empty:
+            if not self.block:
+                self.dropped += 1
+                return False
+            start = time.perf_counter()
+            index = self._free.get()
+            self.backpressured += 1
+            self.backpressure_seconds += time.perf_counter() - start
+        import pygame
+        pixels = pygame.surfarray.pixels3d(surface)
+        np.copyto(self._buffers[index], pixels[:self.width, :self.height])
+        # The view locks the surface until it is released
+        del pixels
+        self._filled.put(index)
+        return True
+
+    def _encode(self):
+        frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        while True:
+            index = self._filled.get()
+            if index is None:
+                break
+            try:
+                # RGB columns to BGR rows in a single copy
+                np.copyto(frame, self._buffers[index].transpose(1, 0, 2)[:, :, ::-1])
+                self._writer.write(frame)
+                self.frames_written += 1
+            except Exception as e:
+                self.error = e
+            finally:
+                self._free.put(index)
+
+    def close(self):
+        """Flush queued frames, finalize the file and return the recording stats"""
+        if self._thread.is_alive():
+            self._filled.put(None)
+            self._thread.join()
+            self._writer.release()
+        stats = self.stats()
+        print(f"🎬 Recorded {stats['frames_written']} frames to {self.output_path} "
+              f"in {stats['wall_seconds']:.1f}s ({stats['realtime_factor']:.1f}x realtime)")
+        if self.dropped or self.backpressured:
+            print(f"⚠️ Encoder fell behind: {self.dropped} frames dropped, "
+                  f"{self.backpressured} waited {self.backpressure_seconds:.2f}s for a buffer")
+        if self.error is not None:
+            print(f"❌ Encoding failed: {self.error}")
+        return stats
+
+    def stats(self):
+        wall = time.perf_counter() - self._started
+        return {
+            'frames_offered': self.frames_offered,
+            'frames_written': self.frames_written,
+            'dropped': self.dropped,
+            'backpressured': self.backpressured,
+            'backpressure_seconds': self.backpressure_seconds,
+            'video_seconds': self.frames_written / self.fps,
+            'wall_seconds': wall,
+            'realtime_factor': (self.frames_written / self.fps) / wall if wall > 0 else 0.0,
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Render an aquarium video loop offscreen")
+    parser.add_argument("--output", default="assets/output/aquarium.mp4")
+    parser.add_argument("--sprite", default="assets/input/fish.jpg")
+    parser.add_argument("--background", default="assets/backgrounds/background.jpg")
+    parser.add_argument("--size", default="1280x720", help="video size as WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--fish", type=int, default=8)
+    parser.add_argument("--world", help="world size as WIDTHxHEIGHT, recorded through a centered camera")
+    parser.add_argument("--demo", action="store_true", help="record the advanced demo scene")
+    parser.add_argument("--codec", default="mp4v", help="four-character code passed to cv2.VideoWriter")
+    parser.add_argument("--buffers", type=int, default=8, help="frames the encoder may fall behind by")
+    parser.add_argument("--window", action="store_true", help="show the window while recording (real time)")
+    args = parser.parse_args()
+
+    if not args.window:
+        # Must be set before pygame initializes any video state
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from src.asset_cache import ProcessedAssetCache
+    from src.animation import run_animation, create_demo_aquarium
+
+    sprite_path = ProcessedAssetCache().process(args.sprite) or args.sprite
+    background_path = args.background if os.path.exists(args.background) else None
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    world_size = tuple(int(v) for v in args.world.lower().split("x")) if args.world else None
+    recorder = VideoRecorder(args.output, width, height, args.fps, args.seconds,
+                             args.buffers, args.codec, headless=not args.window)
+    if args.demo:
+        asyncio.run(create_demo_aquarium(sprite_path, background_path, recorder=recorder, world_size=world_size))
+    else:
+        asyncio.run(run_animation(background_path, sprite_path, args.fish, recorder=recorder,
+                                  world_size=world_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#scheduler.py
+import asyncio
+import time
+
+class FixedStepScheduler:
+    """
+    Runs the simulation at a fixed rate independent of how fast frames render.
+    Each frame, advance() says how many simulation steps are due and alpha is
+    how far the display sits between the last two simulated states. The clock
+    can be swapped for a virtual one, e.g. video time while recording.
+    """
+    def __init__(self, step_rate=60, max_fps=60, max_steps_per_frame=5, clock=time.perf_counter):
+        self.step_seconds = 1.0 / step_rate
+        self.frame_seconds = 1.0 / max_fps if max_fps else 0.0
+        # Past this many steps a frame drops the backlog instead of spiraling
+        self.max_steps_per_frame = max_steps_per_frame
+        self.accumulator = 0.0
+        self.dropped_steps = 0
+        self.clock = clock
+        self._last_time = clock()
+        self._next_frame = time.perf_counter()
+        
+    def advance(self):
+        now = self.clock()
+        self.accumulator += now - self._last_time
+        self._last_time = now
+        steps = int(self.accumulator / self.step_seconds)
+        self.accumulator -= steps * self.step_seconds
+        if steps > self.max_steps_per_frame:
+            self.dropped_steps += steps - self.max_steps_per_frame
+            steps = self.max_steps_per_frame
+        return steps
+    
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.step_seconds)
+    
+    async def pace(self):
+        """The loop's only wait: sleep until the next frame is due, always yielding once"""
+        now = time.perf_counter()
+        self._next_frame += self.frame_seconds
+        if self._next_frame < now:
+            # Running behind, render the next frame straight away rather than bursting to catch up
+            self._next_frame = now
+        await asyncio.sleep(self._next_frame - now)
@@ -0,0 +1,75 @@
+#spatial_hash.py
+import math
+
+class SpatialHash:
+    """Uniform grid of fish buckets for fixed-radius neighbor queries"""
+    def __init__(self, cell_size=120, slack=10):
+        self.cell_size = cell_size
+        # Fish keep moving after the frame's rebuild, so queries look a little
+        # further than asked and filter on current positions
+        self.slack = slack
+        self.cells = {}
+        
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+    
+    def rebuild(self, fish_list, cell_size=None):
+        if cell_size:
+            self.cell_size = cell_size
+        cells = {}
+        for fish in fish_list:
+            key = self._cell(fish.x, fish.y)
+            bucket = cells.get(key)
+            if bucket is None:
+                cells[key] = [fish]
+            else:
+                bucket.append(fish)
+        self.cells = cells
+        
+    def clear(self):
+        self.cells = {}
+        
+    def remove(self, fish):
+        """Drop one fish until the next rebuild, e.g. when it leaves the tank mid-frame"""
+        # It has usually not left the cell it was filed under since the rebuild
+        buckets = [self.cells.get(self._cell(fish.x, fish.y))]
+        buckets.extend(self.cells.values())
+        for bucket in buckets:
+            if bucket and fish in bucket:
+                bucket.remove(fish)
+                return
+        
+    def query(self, x, y, radius, exclude=None):
+        """Return (fish, distance) pairs closer than radius to (x, y)"""
+        reach = radius + self.slack
+        min_cx, min_cy = self._cell(x - reach, y - reach)
+        max_cx, max_cy = self._cell(x + reach, y + reach)
+        radius_sq = radius * radius
+        nearby = []
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                bucket = self.cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for fish in bucket:
+                    if fish is exclude:
+                        continue
+                    other_x, other_y = fish.x, fish.y
+                    distance_sq = (x - other_x)**2 + (y - other_y)**2
+                    if distance_sq < radius_sq:
+                        nearby.append((fish, math.sqrt(distance_sq)))
+        return nearby
+
+    def count(self, x, y, radius, exclude=None):
+        """Number of fish closer than radius to (x, y), without building the pair list"""
+        reach = radius + self.slack
+        min_cx, min_cy = self._cell(x - reach, y - reach)
+        max_cx, max_cy = self._cell(x + reach, y + reach)
+        radius_sq = radius * radius
+        total = 0
+        for cx in range(min_cx, max_cx + 1):
+            for cy in range(min_cy, max_cy + 1):
+                for fish in self.cells.get((cx, cy), ()):
+                    if fish is not exclude and (x - fish.x)**2 + (y - fish.y)**2 < radius_sq:
+                        total += 1
+        return total
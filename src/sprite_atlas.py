@@ -0,0 +1,64 @@
+#sprite_atlas.py
+import pygame
+
+MAX_ROTATION = 15
+MIN_SCALE, MAX_SCALE = 0.7, 1.0
+MIN_ALPHA, MAX_ALPHA = 0.4, 1.0
+
+class SpriteVariantAtlas:
+    """
+    Pre-rendered flip/rotation/scale/alpha variants of one sprite so fish can
+    pick a ready surface instead of transforming their image every frame
+    """
+    def __init__(self, image, angle_step=3.0, scale_levels=4, alpha_levels=4):
+        self.angle_step = angle_step
+        self.scale_levels = max(1, scale_levels)
+        self.alpha_levels = max(1, alpha_levels)
+        angle_count = int(round(MAX_ROTATION / angle_step))
+        self.angles = [i * angle_step for i in range(-angle_count, angle_count + 1)]
+        self.scales = self._levels(MIN_SCALE, MAX_SCALE, self.scale_levels)
+        self.alphas = [int(255 * level) for level in self._levels(MIN_ALPHA, MAX_ALPHA, self.alpha_levels)]
+        self.variants = {}
+        for flip in (False, True):
+            flipped = pygame.transform.flip(image, True, False) if flip else image
+            for angle_index, angle in enumerate(self.angles):
+                rotated = pygame.transform.rotate(flipped, -angle) if abs(angle) > 1 else flipped
+                for scale_index, scale in enumerate(self.scales):
+                    size = (max(1, int(rotated.get_width() * scale)),
+                            max(1, int(rotated.get_height() * scale)))
+                    scaled = pygame.transform.scale(rotated, size)
+                    for alpha_index, alpha in enumerate(self.alphas):
+                        variant = scaled.copy()
+                        variant.set_alpha(alpha)
+                        self.variants[(flip, angle_index, scale_index, alpha_index)] = variant
+
+    @staticmethod
+    def _levels(low, high, count):
+        if count == 1:
+            return [high]
+        return [low + (high - low) * i / (count - 1) for i in range(count)]
+
+    @staticmethod
+    def _nearest(value, low, high, count):
+        if count == 1:
+            return 0
+        position = (value - low) / (high - low) * (count - 1)
+        return max(0, min(count - 1, int(round(position))))
+
+    def get(self, flip, angle, scale, alpha):
+        """Return the shared surface closest to the requested transform; never modify it"""
+        angle_index = self._nearest(angle, self.angles[0], self.angles[-1], len(self.angles))
+        scale_index = self._nearest(scale, MIN_SCALE, MAX_SCALE, self.scale_levels)
+        alpha_index = self._nearest(alpha / 255, MIN_ALPHA, MAX_ALPHA, self.alpha_levels)
+        return self.variants[(flip, angle_index, scale_index, alpha_index)]
+
+    def memory_report(self):
+        total_bytes = sum(surface.get_width() * surface.get_height() * surface.get_bytesize()
+                          for surface in self.variants.values())
+        return {
+            'variants': len(self.variants),
+            'angles': len(self.angles),
+            'scales': self.scale_levels,
+            'alphas': self.alpha_levels,
+            'bytes': total_bytes,
+        }
@@ -2,57 +2,208 @@
 import pygame
 import random
 import math
+import os
+import hashlib
+import bisect
+import time
+from operator import attrgetter
+from itertools import repeat
+from collections import deque, OrderedDict
+import numpy as np
+from src.spatial_hash import SpatialHash
+from src.transitions import TransitionQueue
+from src.food import FoodSystem
+from src.flow_field import FlowField
+from src.sprite_atlas import SpriteVariantAtlas
+from src.asset_cache import ProcessedAssetCache
+from src.snapshot import (write_snapshot, read_snapshot, encode_rng_state, decode_rng_state,
+                          TRANSITIONS_VERSION, FOOD_VERSION, FLOW_VERSION)
+from src.swarm_kernels import STATES, SWIM_STYLES
 
-class Fish:
-    def __init__(self, sprite_path, x, y, screen_width, screen_height):
-        # Load and prepare sprite
-        try:
-            self.original_image = pygame.image.load(sprite_path).convert_alpha()
-        except Exception as e:
-            print(f"Failed to load sprite: {e}")
-            # Create a default placeholder sprite
-            self.original_image = pygame.Surface((50, 30), pygame.SRCALPHA)
-            self.original_image.fill((255, 100, 100, 200))  # Semi-transparent red fish
+# Per-fish attributes saved in snapshots, besides state, style and sprite
+SNAPSHOT_FLOATS = ('x', 'y', 'previous_x', 'previous_y', 'velocity_x', 'velocity_y', 'direction', 'target_direction', 'speed', 'base_speed',
+                   'energy', 'tail_beat_frequency', 'following_tendency', 'personal_space', 'swim_phase',
+                   'body_undulation', 'depth_layer', 'comfort_distance', 'boundary_comfort',
+                   'panic_distance', 'current_scale', 'target_scale', 'acceleration', 'drag')
+SNAPSHOT_INTS = ('time', 'state_until', 'serial')
+
+_processed_assets = ProcessedAssetCache()
+
+def _load_sprite(sprite_path, max_size=80):
+    # A photo that has been through background removal loads its processed version
+    processed = _processed_assets.lookup(sprite_path) if os.path.isfile(sprite_path) else None
+    try:
+        image = pygame.image.load(processed or sprite_path)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+    except Exception as e:
+        print(f"Failed to load sprite: {e}")
+        # Create a default placeholder sprite
+        image = pygame.Surface((50, 30), pygame.SRCALPHA)
+        image.fill((255, 100, 100, 200))  # Semi-transparent red fish
+    
+    original_size = image.get_size()
+    scale_factor = min(max_size / max(original_size), 1.0)
+    new_size = (int(original_size[0] * scale_factor), int(original_size[1] * scale_factor))
+    return pygame.transform.scale(image, new_size)
+
+class SpriteAssetCache:
+    """
+    Decodes and pre-scales each sprite once, shared by every fish using it.
+    Atlases at the base size stay for good; the ones rendered for camera
+    zoom levels are grouped by size, and only the max_zoom_sizes most
+    recently used sizes are kept, so zooming around cannot pile them up.
+    """
+    def __init__(self, angle_step=3.0, scale_levels=4, alpha_levels=4, base_size=80, max_zoom_sizes=3):
+        self._surfaces = {}
+        self._atlases = {}
+        # size -> {key: atlas}, least recently used size first
+        self._zoom_atlases = OrderedDict()
+        # Quantization of the pre-rendered variant atlases
+        self.angle_step = angle_step
+        self.scale_levels = scale_levels
+        self.alpha_levels = alpha_levels
+        self.base_size = base_size
+        self.max_zoom_sizes = max_zoom_sizes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         
-        original_size = self.original_image.get_size()
-        scale_factor = min(80 / max(original_size), 1.0)
-        new_size = (int(original_size[0] * scale_factor), int(original_size[1] * scale_factor))
-        self.original_image = pygame.transform.scale(self.original_image, new_size)
+    def get(self, sprite_path, max_size=80):
+        key = (os.path.normpath(sprite_path), max_size)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            self.misses += 1
+            surface = _load_sprite(sprite_path, max_size)
+            self._surfaces[key] = surface
+        else:
+            self.hits += 1
+        return surface
+    
+    def get_atlas(self, sprite_path, max_size=80):
+        key = (os.path.normpath(sprite_path), max_size)
+        if max_size == self.base_size:
+            atlases = self._atlases
+        else:
+            atlases = self._zoom_atlases.get(max_size)
+            if atlases is None:
+                atlases = self._zoom_atlases[max_size] = {}
+                self._evict_zoom_sizes()
+            else:
+                self._zoom_atlases.move_to_end(max_size)
+        atlas = atlases.get(key)
+        if atlas is None:
+            atlas = SpriteVariantAtlas(self.get(sprite_path, max_size), self.angle_step,
+                                       self.scale_levels, self.alpha_levels)
+            atlases[key] = atlas
+        return atlas
+    
+    def _evict_zoom_sizes(self):
+        while len(self._zoom_atlases) > self.max_zoom_sizes:
+            _, atlases = self._zoom_atlases.popitem(last=False)
+            for key in atlases:
+                self._surfaces.pop(key, None)
+            self.evictions += 1
+    
+    def invalidate(self, sprite_path=None):
+        """Drop cached surfaces for one sprite path, or everything if no path is given"""
+        if sprite_path is None:
+            self._surfaces.clear()
+            self._atlases.clear()
+            self._zoom_atlases.clear()
+            return
+        path = os.path.normpath(sprite_path)
+        for cache in (self._surfaces, self._atlases, *self._zoom_atlases.values()):
+            for key in [k for k in cache if k[0] == path]:
+                del cache[key]
+    
+    def stats(self):
+        atlases = list(self._atlases.values())
+        for sized in self._zoom_atlases.values():
+            atlases.extend(sized.values())
+        return {'entries': len(self._surfaces), 'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'atlases': len(atlases),
+                'atlas_bytes': sum(atlas.memory_report()['bytes'] for atlas in atlases)}
+    
+    def memory_report(self):
+        report = {path: atlas.memory_report() for path, atlas in self._atlases.items()}
+        for sized in self._zoom_atlases.values():
+            report.update((path, atlas.memory_report()) for path, atlas in sized.items())
+        return report
+
+# Fish made without a manager share one cache instead of decoding the sprite each
+_shared_sprite_cache = SpriteAssetCache()
+
+class NeighborContext:
+    """Neighbor totals gathered for one fish in a single pass per frame"""
+    def __init__(self):
+        self.neighbors = 0  # fish within comfort distance, excluding overlaps
+        self.separation_x = self.separation_y = 0
+        self.alignment_x = self.alignment_y = 0
+        self.cohesion_x = self.cohesion_y = 0
+        self.leader = None
+
+class Fish:
+    """
+    One simulated fish. Position is kept as floats so sub-pixel motion
+    accumulates; the blit rect is derived from it only when drawing. Slots
+    instead of a per-instance __dict__ keep large populations compact.
+    """
+    __slots__ = ('rng', 'sprite_path', 'original_image', 'atlas', 'image', 'x', 'y',
+                 'previous_x', 'previous_y', 'screen_width', 'screen_height', 'base_speed', 'speed',
+                 'direction', 'target_direction', 'tail_beat_frequency', 'following_tendency',
+                 'personal_space', 'energy', 'swim_style', 'time', 'swim_phase', 'body_undulation',
+                 'depth_layer', 'comfort_distance', 'boundary_comfort', 'panic_distance',
+                 'flip_horizontal', 'current_scale', 'target_scale', 'state', 'state_until', 'serial',
+                 'velocity_x', 'velocity_y', 'acceleration', 'drag')
+
+    def __init__(self, sprite_path, x, y, screen_width, screen_height, sprite_cache=None, rng=None, tick=0):
+        # Seeded managers hand every fish their random.Random so runs can be replayed
+        self.rng = rng if rng is not None else random
+        # Shared sprites are read-only: fish pick pre-rendered variants from the atlas
+        if sprite_cache is None:
+            sprite_cache = _shared_sprite_cache
+        self.sprite_path = sprite_path
+        self.original_image = sprite_cache.get(sprite_path)
+        self.atlas = sprite_cache.get_atlas(sprite_path)
         
-        self.image = self.original_image.copy()
-        self.rect = self.image.get_rect()
-        self.rect.center = (x, y)
+        # Sprites are never drawn on, so every fish can start on the shared surface
+        self.image = self.original_image
+        self.x = float(x)
+        self.y = float(y)
+        self.previous_x = self.x
+        self.previous_y = self.y
         
         self.screen_width = screen_width
         self.screen_height = screen_height
         
         # Initialize ALL attributes BEFORE calling _setup_swim_style()
-        self.base_speed = random.uniform(0.8, 2.5)
+        self.base_speed = self.rng.uniform(0.8, 2.5)
         self.speed = self.base_speed
-        self.direction = random.uniform(0, 360)
+        self.direction = self.rng.uniform(0, 360)
         self.target_direction = self.direction
         
         # Initialize attributes that _setup_swim_style() will modify
-        self.tail_beat_frequency = random.uniform(0.15, 0.35)
-        self.following_tendency = random.uniform(0.1, 0.8)
-        self.personal_space = random.uniform(25, 60)
-        self.energy = random.uniform(0.7, 1.0)
+        self.tail_beat_frequency = self.rng.uniform(0.15, 0.35)
+        self.following_tendency = self.rng.uniform(0.1, 0.8)
+        self.personal_space = self.rng.uniform(25, 60)
+        self.energy = self.rng.uniform(0.7, 1.0)
         
         # Now it's safe to call _setup_swim_style()
-        self.swim_style = random.choice(['cruiser', 'darting', 'lazy', 'active'])
+        self.swim_style = self.rng.choice(['cruiser', 'darting', 'lazy', 'active'])
         self._setup_swim_style()
         
         # Continue with other initializations
         self.time = 0
-        self.swim_phase = random.uniform(0, 2 * math.pi)
-        self.body_undulation = random.uniform(0.5, 1.5)
+        self.swim_phase = self.rng.uniform(0, 2 * math.pi)
+        self.body_undulation = self.rng.uniform(0.5, 1.5)
         
-        self.depth_layer = random.uniform(0.3, 1.0)
+        self.depth_layer = self.rng.uniform(0.3, 1.0)
         self.speed *= self.depth_layer
         
-        self.comfort_distance = random.uniform(60, 120)
+        self.comfort_distance = self.rng.uniform(60, 120)
         
-        self.boundary_comfort = random.uniform(40, 80)
+        self.boundary_comfort = self.rng.uniform(40, 80)
         self.panic_distance = 20
         
         self.flip_horizontal = False
@@ -60,13 +211,21 @@ class Fish:
         self.target_scale = 1.0
         
         self.state = 'exploring'
-        self.state_timer = random.randint(180, 600)
+        # Simulation tick at which the manager re-decides the state
+        self.state_until = tick + self.rng.randint(180, 600)
+        # Creation order, assigned by the manager; breaks ties between equal expiries
+        self.serial = 0
         
-        self.velocity_x = 0
-        self.velocity_y = 0
+        self.velocity_x = 0.0
+        self.velocity_y = 0.0
         self.acceleration = 0.03
         self.drag = 0.95
         
+    @property
+    def rect(self):
+        """Blit rect at the nearest pixel, built on demand"""
+        return self.image.get_rect(center=(round(self.x), round(self.y)))
+
     def _setup_swim_style(self):
         if self.swim_style == 'cruiser':
             self.base_speed *= 0.8
@@ -84,103 +243,146 @@ class Fish:
             self.base_speed *= 1.1
             self.tail_beat_frequency *= 1.2
             
-    def update(self, other_fish=None, food_sources=None):
+    def update(self, other_fish=None, food_sources=None, spatial_index=None):
+        self.simulate(other_fish, food_sources, spatial_index)
+        self._update_visual_state()
+        
+    def simulate(self, other_fish=None, food_sources=None, spatial_index=None):
+        self.update_behavior(other_fish, food_sources, spatial_index)
+        self.update_physics()
+        
+    def update_behavior(self, other_fish=None, food_sources=None, spatial_index=None):
         self.time += 1
-        self.state_timer -= 1
-        self._update_behavior_state(other_fish)
+        neighbors = self._gather_neighbors(other_fish, spatial_index) if other_fish else None
         self._handle_boundaries()
-        if other_fish:
-            self._advanced_schooling_behavior(other_fish)
+        if neighbors:
+            self._advanced_schooling_behavior(neighbors)
         
         if self.state == 'exploring':
             self._explore_behavior()
         elif self.state == 'schooling':
-            self._schooling_behavior_enhanced(other_fish)
+            self._schooling_behavior_enhanced(neighbors)
         elif self.state == 'feeding':
             self._feeding_behavior(food_sources)
         elif self.state == 'resting':
             self._resting_behavior()
             
+    def simulate_reduced(self):
+        """
+        Cheap tick for fish the LOD scheduler skipped: the fish keeps steering
+        toward its last target, but no neighbor queries happen until its next
+        full update. State transitions are scheduled by the manager either way.
+        """
+        self.time += 1
+        self.update_physics()
+        
+    def update_physics(self):
+        # Kept so renderers can interpolate between simulation steps
+        self.previous_x = self.x
+        self.previous_y = self.y
         self._apply_physics()
         self._add_natural_swimming_motion()
         
-        self.rect.centerx += self.velocity_x
-        self.rect.centery += self.velocity_y
+        self.x += self.velocity_x
+        self.y += self.velocity_y
         self._enforce_boundaries()
-        self._update_visual_state()
         
-    def _update_behavior_state(self, other_fish):
-        if self.state_timer <= 0:
-            nearby_fish_count = 0
-            if other_fish:
-                center_x, center_y = self.rect.center
-                for fish in other_fish:
-                    if fish != self:
-                        other_x, other_y = fish.rect.center
-                        distance = math.sqrt((center_x - other_x)**2 + (center_y - other_y)**2)
-                        if distance < 100:
-                            nearby_fish_count += 1
-            
-            if nearby_fish_count >= 3:
-                self.state = 'schooling'
-                self.state_timer = random.randint(300, 900)
-            elif self.energy < 0.3:
-                self.state = 'resting'
-                self.state_timer = random.randint(120, 300)
-            elif random.random() < 0.3:
-                self.state = 'feeding'
-                self.state_timer = random.randint(180, 400)
-            else:
-                self.state = 'exploring'
-                self.state_timer = random.randint(200, 600)
-                
-    def _explore_behavior(self):
-        if random.random() < 0.008:
-            self.target_direction += random.uniform(-60, 60)
-        if random.random() < 0.005:
-            if self.rect.centery < self.screen_height * 0.3:
-                self.target_direction = random.uniform(45, 135)
-            elif self.rect.centery > self.screen_height * 0.7:
-                self.target_direction = random.uniform(225, 315)
-                
-    def _schooling_behavior_enhanced(self, other_fish):
-        if not other_fish:
-            return
-        center_x, center_y = self.rect.center
-        nearby_fish = []
+    def _nearby_fish(self, other_fish, radius, spatial_index=None):
+        center_x, center_y = self.x, self.y
+        if spatial_index is not None:
+            return spatial_index.query(center_x, center_y, radius, exclude=self)
+        nearby = []
         for fish in other_fish:
             if fish == self:
                 continue
-            other_x, other_y = fish.rect.center
+            other_x, other_y = fish.x, fish.y
             distance = math.sqrt((center_x - other_x)**2 + (center_y - other_y)**2)
-            if distance < self.comfort_distance:
-                nearby_fish.append((fish, distance))
+            if distance < radius:
+                nearby.append((fish, distance))
+        return nearby
+    
+    def _gather_neighbors(self, other_fish, spatial_index=None):
+        center_x, center_y = self.x, self.y
+        context = NeighborContext()
+        leader_score = None
+        # The state machine counts its own 100 px neighborhood, so only comfort distance is needed here
+        for fish, distance in self._nearby_fish(other_fish, self.comfort_distance, spatial_index):
+            score = fish.energy * fish.speed
+            if leader_score is None or score > leader_score:
+                context.leader = fish
+                leader_score = score
+            if distance > 0:
+                other_x, other_y = fish.x, fish.y
+                context.neighbors += 1
+                if distance < self.personal_space:
+                    context.separation_x += (center_x - other_x) / distance
+                    context.separation_y += (center_y - other_y) / distance
+                heading = math.radians(fish.direction)
+                context.alignment_x += math.cos(heading)
+                context.alignment_y += math.sin(heading)
+                context.cohesion_x += other_x
+                context.cohesion_y += other_y
+        return context
         
-        if not nearby_fish:
+    def transition(self, tick, nearby_fish_count):
+        """Pick the next behavior state once the current one expires at tick"""
+        if nearby_fish_count >= 3:
+            self.state = 'schooling'
+            self.state_until = tick + self.rng.randint(300, 900)
+        elif self.energy < 0.3:
+            self.state = 'resting'
+            self.state_until = tick + self.rng.randint(120, 300)
+        elif self.rng.random() < 0.3:
+            self.state = 'feeding'
+            self.state_until = tick + self.rng.randint(180, 400)
+        else:
+            self.state = 'exploring'
+            self.state_until = tick + self.rng.randint(200, 600)
+                
+    def _explore_behavior(self):
+        if self.rng.random() < 0.008:
+            self.target_direction += self.rng.uniform(-60, 60)
+        if self.rng.random() < 0.005:
+            if self.y < self.screen_height * 0.3:
+                self.target_direction = self.rng.uniform(45, 135)
+            elif self.y > self.screen_height * 0.7:
+                self.target_direction = self.rng.uniform(225, 315)
+                
+    def _schooling_behavior_enhanced(self, neighbors):
+        if not neighbors or neighbors.leader is None:
             return
-        leader = max(nearby_fish, key=lambda x: x[0].energy * x[0].speed)[0]
+        leader = neighbors.leader
         leader_influence = 0.3 * self.following_tendency
         self.target_direction = (self.target_direction * (1 - leader_influence) + 
                                leader.direction * leader_influence)
         
     def _feeding_behavior(self, food_sources):
-        target_y = self.screen_height * random.uniform(0.4, 0.6)
-        current_y = self.rect.centery
+        # Head for the closest pellet in sight, eating it once close enough
+        found = food_sources.nearest(self.x, self.y, 250) if food_sources else None
+        if found is not None:
+            food, distance = found
+            if distance < 12:
+                food_sources.consume(food)
+            else:
+                self.target_direction = math.degrees(math.atan2(food.y - self.y, food.x - self.x)) % 360
+            return
+        target_y = self.screen_height * self.rng.uniform(0.4, 0.6)
+        current_y = self.y
         if abs(current_y - target_y) > 20:
             if current_y < target_y:
-                self.target_direction = random.uniform(45, 135)
+                self.target_direction = self.rng.uniform(45, 135)
             else:
-                self.target_direction = random.uniform(225, 315)
+                self.target_direction = self.rng.uniform(225, 315)
         self.speed = self.base_speed * 0.6
         
     def _resting_behavior(self):
-        if self.rect.centery < self.screen_height * 0.7:
-            self.target_direction = random.uniform(45, 135)
+        if self.y < self.screen_height * 0.7:
+            self.target_direction = self.rng.uniform(45, 135)
         self.speed = self.base_speed * 0.3
         self.energy = min(1.0, self.energy + 0.002)
         
     def _handle_boundaries(self):
-        center_x, center_y = self.rect.center
+        center_x, center_y = self.x, self.y
         distances = {
             'left': center_x,
             'right': self.screen_width - center_x,
@@ -190,13 +392,13 @@ class Fish:
         for boundary, distance in distances.items():
             if distance < self.panic_distance:
                 if boundary == 'left':
-                    self.target_direction = random.uniform(-30, 30)
+                    self.target_direction = self.rng.uniform(-30, 30)
                 elif boundary == 'right':
-                    self.target_direction = random.uniform(150, 210)
+                    self.target_direction = self.rng.uniform(150, 210)
                 elif boundary == 'top':
-                    self.target_direction = random.uniform(45, 135)
+                    self.target_direction = self.rng.uniform(45, 135)
                 elif boundary == 'bottom':
-                    self.target_direction = random.uniform(225, 315)
+                    self.target_direction = self.rng.uniform(225, 315)
                 self.speed = self.base_speed * 1.5
                 return
         steering_force = 0
@@ -214,37 +416,18 @@ class Fish:
         if steering_force != 0:
             self.target_direction += steering_force * 0.1
             
-    def _advanced_schooling_behavior(self, other_fish):
-        if not other_fish:
-            return
-        center_x, center_y = self.rect.center
-        separation_x = separation_y = 0
-        alignment_x = alignment_y = 0
-        cohesion_x = cohesion_y = 0
-        neighbors = 0
-        for fish in other_fish:
-            if fish == self:
-                continue
-            other_x, other_y = fish.rect.center
-            distance = math.sqrt((center_x - other_x)**2 + (center_y - other_y)**2)
-            if distance < self.comfort_distance and distance > 0:
-                neighbors += 1
-                if distance < self.personal_space:
-                    separation_x += (center_x - other_x) / distance
-                    separation_y += (center_y - other_y) / distance
-                alignment_x += math.cos(math.radians(fish.direction))
-                alignment_y += math.sin(math.radians(fish.direction))
-                cohesion_x += other_x
-                cohesion_y += other_y
-        if neighbors > 0:
+    def _advanced_schooling_behavior(self, neighbors):
+        if neighbors.neighbors > 0:
+            center_x, center_y = self.x, self.y
+            separation_x, separation_y = neighbors.separation_x, neighbors.separation_y
             if separation_x != 0 or separation_y != 0:
                 sep_direction = math.degrees(math.atan2(separation_y, separation_x))
                 self.target_direction = sep_direction
             else:
-                avg_alignment_x = alignment_x / neighbors
-                avg_alignment_y = alignment_y / neighbors
-                avg_cohesion_x = cohesion_x / neighbors
-                avg_cohesion_y = cohesion_y / neighbors
+                avg_alignment_x = neighbors.alignment_x / neighbors.neighbors
+                avg_alignment_y = neighbors.alignment_y / neighbors.neighbors
+                avg_cohesion_x = neighbors.cohesion_x / neighbors.neighbors
+                avg_cohesion_y = neighbors.cohesion_y / neighbors.neighbors
                 desired_x = avg_alignment_x * 0.3 + (avg_cohesion_x - center_x) * 0.1
                 desired_y = avg_alignment_y * 0.3 + (avg_cohesion_y - center_y) * 0.1
                 if desired_x != 0 or desired_y != 0:
@@ -294,57 +477,68 @@ class Fish:
         
     def _enforce_boundaries(self):
         margin = 10
-        self.rect.centerx = max(margin, min(self.screen_width - margin, self.rect.centerx))
-        self.rect.centery = max(margin, min(self.screen_height - margin, self.rect.centery))
+        self.x = max(margin, min(self.screen_width - margin, self.x))
+        self.y = max(margin, min(self.screen_height - margin, self.y))
         
-    def _update_visual_state(self):
-        should_flip = 90 < self.direction < 270
-        if should_flip != self.flip_horizontal:
-            self.flip_horizontal = should_flip
-            base_image = pygame.transform.flip(self.original_image, True, False)
-        else:
-            base_image = self.original_image.copy()
+    def _update_visual_state(self, atlas=None):
+        # A camera zoomed away from 1x passes an atlas rendered at the zoomed size
+        atlas = atlas or self.atlas
+        self.flip_horizontal = 90 < self.direction < 270
         rotation_angle = 0
         if abs(self.velocity_y) > 0.5:
             max_rotation = 15
             rotation_angle = (self.velocity_y / 3.0) * max_rotation
             rotation_angle = max(-max_rotation, min(max_rotation, rotation_angle))
-        if abs(rotation_angle) > 1:
-            base_image = pygame.transform.rotate(base_image, -rotation_angle)
         depth_scale = 0.7 + (self.depth_layer * 0.3)
         if abs(depth_scale - self.current_scale) > 0.01:
             self.current_scale += (depth_scale - self.current_scale) * 0.05
-            new_size = (int(base_image.get_width() * self.current_scale),
-                       int(base_image.get_height() * self.current_scale))
-            base_image = pygame.transform.scale(base_image, new_size)
         alpha = int(255 * (0.4 + self.depth_layer * 0.6))
-        base_image.set_alpha(alpha)
-        old_center = self.rect.center
-        self.image = base_image
-        self.rect = self.image.get_rect()
-        self.rect.center = old_center
+        self.image = atlas.get(self.flip_horizontal, rotation_angle, self.current_scale, alpha)
 
 class SpriteManager:
-    def __init__(self, screen_width=800, screen_height=600):
+    def __init__(self, screen_width=800, screen_height=600, seed=None):
         self.fish_list = []
+        self.rng = random.Random(seed)
         self.screen_width = screen_width
         self.screen_height = screen_height
-        self.water_current_x = 0
-        self.water_current_y = 0
-        self.current_change_timer = 0
+        # Spatially varying water current, sampled for every fish once per tick
+        self.flow = FlowField(screen_width, screen_height, self.rng)
+        # Simulation ticks so far; state expiries are scheduled against it
+        self.tick = 0
+        self.transitions = TransitionQueue()
+        self._next_serial = 0
+        self.food = FoodSystem(screen_width, screen_height)
+        self.sprite_cache = SpriteAssetCache()
+        self.spatial_index = SpatialHash()
+        self.profiler = None
+        # Optional LODScheduler; when set only part of the school runs full behavior each tick
+        self.lod = None
+        # Fish sorted back to front; depth_layer never changes after creation
+        self.render_order = []
+        self._render_depths = []
+        
+    def _register(self, fish):
+        self.fish_list.append(fish)
+        fish.serial = self._next_serial
+        self._next_serial += 1
+        self.transitions.push(fish)
+        index = bisect.bisect_right(self._render_depths, fish.depth_layer)
+        self._render_depths.insert(index, fish.depth_layer)
+        self.render_order.insert(index, fish)
         
     def create_sprite(self, sprite_path, count=1):
         for _ in range(count):
-            x = random.randint(80, self.screen_width - 80)
-            y = random.randint(80, self.screen_height - 80)
-            fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height)
-            self.fish_list.append(fish)
+            x = self.rng.randint(80, self.screen_width - 80)
+            y = self.rng.randint(80, self.screen_height - 80)
+            fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height,
+                        sprite_cache=self.sprite_cache, rng=self.rng, tick=self.tick)
+            self._register(fish)
     
     def create_school(self, sprite_path, count=5, center_x=None, center_y=None):
         if center_x is None:
-            center_x = random.randint(150, self.screen_width - 150)
+            center_x = self.rng.randint(150, self.screen_width - 150)
         if center_y is None:
-            center_y = random.randint(150, self.screen_height - 150)
+            center_y = self.rng.randint(150, self.screen_height - 150)
         school_radius = min(80, count * 15)
         for i in range(count):
             angle = i * 137.5
@@ -353,52 +547,309 @@ class SpriteManager:
             y = center_y + radius * math.sin(math.radians(angle))
             x = max(80, min(self.screen_width - 80, x))
             y = max(80, min(self.screen_height - 80, y))
-            fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height)
-            base_direction = random.uniform(0, 360)
-            fish.direction = base_direction + random.uniform(-30, 30)
+            fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height,
+                        sprite_cache=self.sprite_cache, rng=self.rng, tick=self.tick)
+            base_direction = self.rng.uniform(0, 360)
+            fish.direction = base_direction + self.rng.uniform(-30, 30)
             fish.target_direction = fish.direction
-            fish.following_tendency = random.uniform(0.5, 0.9)
-            self.fish_list.append(fish)
+            fish.following_tendency = self.rng.uniform(0.5, 0.9)
+            self._register(fish)
     
     def create_mixed_school(self, sprite_path, total_count=8):
         remaining = total_count
-        school_count = random.randint(2, 4)
+        school_count = self.rng.randint(2, 4)
         for i in range(school_count):
             if remaining <= 0:
                 break
-            school_size = random.randint(1, min(remaining, 4))
-            center_x = random.randint(150, self.screen_width - 150)
-            center_y = random.randint(150, self.screen_height - 150)
+            school_size = self.rng.randint(1, min(remaining, 4))
+            center_x = self.rng.randint(150, self.screen_width - 150)
+            center_y = self.rng.randint(150, self.screen_height - 150)
             self.create_school(sprite_path, school_size, center_x, center_y)
             remaining -= school_size
     
     def update_sprites(self):
-        self.current_change_timer += 1
-        if self.current_change_timer > 1800:
-            self.water_current_x = random.uniform(-0.2, 0.2)
-            self.water_current_y = random.uniform(-0.1, 0.1)
-            self.current_change_timer = 0
-        for fish in self.fish_list:
-            fish.update(self.fish_list)
-            fish.velocity_x += self.water_current_x
-            fish.velocity_y += self.water_current_y
+        self.simulate()
+        self.update_visuals()
+    
+    def simulate(self):
+        self.flow.update()
+        if self.fish_list:
+            # Cells at least as wide as the largest comfort distance keep queries to 3x3 cells
+            cell_size = max(100, max(fish.comfort_distance for fish in self.fish_list))
+            self.spatial_index.rebuild(self.fish_list, cell_size)
+        self.tick += 1
+        self.food.update()
+        self._fire_transitions()
+        if self.lod is not None:
+            self._simulate_lod()
+        elif self.profiler is None:
+            for fish in self.fish_list:
+                fish.simulate(self.fish_list, self.food, self.spatial_index)
+        else:
+            # Same loop, timing behavior and physics per fish
+            behavior_time = physics_time = 0.0
+            clock = time.perf_counter
+            for fish in self.fish_list:
+                start = clock()
+                fish.update_behavior(self.fish_list, self.food, self.spatial_index)
+                middle = clock()
+                fish.update_physics()
+                end = clock()
+                behavior_time += middle - start
+                physics_time += end - middle
+            self.profiler.add('behavior', behavior_time)
+            self.profiler.add('physics', physics_time)
+        self._apply_current()
+    
+    def _apply_current(self):
+        """Drift every fish with the water, one batched flow field lookup for the whole tank"""
+        fish_list = self.fish_list
+        if not fish_list:
+            return
+        start = time.perf_counter()
+        count = len(fish_list)
+        current_x, current_y = self.flow.sample(np.fromiter(map(attrgetter('x'), fish_list), np.float64, count),
+                                                np.fromiter(map(attrgetter('y'), fish_list), np.float64, count))
+        for fish, drift_x, drift_y in zip(fish_list, current_x.tolist(), current_y.tolist()):
+            fish.velocity_x += drift_x
+            fish.velocity_y += drift_y
+        if self.profiler is not None:
+            self.profiler.add('physics', time.perf_counter() - start)
+    
+    def _fire_transitions(self):
+        """Re-decide behavior only for the fish whose state expired this tick"""
+        start = time.perf_counter()
+        for fish in self.transitions.pop_due(self.tick):
+            # Local density straight from this tick's spatial hash buckets
+            fish.transition(self.tick, self.spatial_index.count(fish.x, fish.y, 100, exclude=fish))
+            self.transitions.push(fish)
+        if self.profiler is not None:
+            self.profiler.add('behavior', time.perf_counter() - start)
+    
+    def _simulate_lod(self):
+        """Full behavior for the fish the scheduler picks, physics only for the rest"""
+        full, reduced = self.lod.plan(self.fish_list, self.spatial_index)
+        clock = time.perf_counter
+        start = clock()
+        for fish in full:
+            fish.simulate(self.fish_list, self.food, self.spatial_index)
+        middle = clock()
+        for fish in reduced:
+            fish.simulate_reduced()
+        end = clock()
+        self.lod.record(len(full), middle - start, len(reduced), end - middle)
+        if self.profiler is not None:
+            self.profiler.add('behavior', middle - start)
+            self.profiler.add('physics', end - middle)
+    
+    def update_visuals(self, camera=None):
+        """Pick every fish's sprite variant; with a camera only fish in or near the view"""
+        start = time.perf_counter()
+        if camera is None:
+            for fish in self.fish_list:
+                fish._update_visual_state()
+        else:
+            left, top, right, bottom = camera.visible_bounds()
+            sprite_size = camera.sprite_size()
+            atlases = {}
+            for fish in self.fish_list:
+                x, y = fish.x, fish.y
+                if x < left or x > right or y < top or y > bottom:
+                    continue
+                atlas = atlases.get(fish.sprite_path)
+                if atlas is None:
+                    atlas = atlases[fish.sprite_path] = self.sprite_cache.get_atlas(fish.sprite_path, sprite_size)
+                fish._update_visual_state(atlas)
+        if self.profiler is not None:
+            self.profiler.add('visuals', time.perf_counter() - start)
+    
+    def draw_sprites(self, screen, alpha=1.0, camera=None):
+        """
+        Draw back to front, alpha < 1 places fish between their last two
+        simulated positions. With a camera, fish outside its view are skipped
+        and the rest are drawn in screen coordinates.
+        """
+        lag = 1.0 - alpha if alpha < 1.0 else 0.0
+        # Food sinks slowly enough to skip interpolation; drawn first so fish swim over it
+        sequence = self._food_sequence(camera)
+        if camera is None:
+            for fish in self.render_order:
+                x = fish.x + (fish.previous_x - fish.x) * lag
+                y = fish.y + (fish.previous_y - fish.y) * lag
+                image = fish.image
+                sequence.append((image, image.get_rect(center=(round(x), round(y)))))
+        else:
+            # A sprite length past the edge covers anything that can overlap the view
+            left, top, right, bottom = camera.visible_bounds(camera.sprite_size() / camera.zoom)
+            view_x, view_y, zoom = camera.x, camera.y, camera.zoom
+            for fish in self.render_order:
+                x = fish.x + (fish.previous_x - fish.x) * lag
+                y = fish.y + (fish.previous_y - fish.y) * lag
+                if x < left or x > right or y < top or y > bottom:
+                    continue
+                image = fish.image
+                sequence.append((image, image.get_rect(center=(round((x - view_x) * zoom),
+                                                               round((y - view_y) * zoom)))))
+        screen.blits(sequence, doreturn=False)
+        return [rect for _, rect in sequence]
     
-    def draw_sprites(self, screen):
-        sorted_fish = sorted(self.fish_list, key=lambda f: f.depth_layer)
-        for fish in sorted_fish:
-            screen.blit(fish.image, fish.rect)
+    def _food_sequence(self, camera=None):
+        if not self.food:
+            return []
+        if camera is None:
+            pellet = self.food.pellet()
+            return [(pellet, pellet.get_rect(center=(round(food.x), round(food.y))))
+                    for food in self.food.particles]
+        pellet = self.food.pellet(round(self.food.pellet_size * camera.zoom))
+        left, top, right, bottom = camera.visible_bounds(self.food.pellet_size)
+        view_x, view_y, zoom = camera.x, camera.y, camera.zoom
+        return [(pellet, pellet.get_rect(center=(round((food.x - view_x) * zoom), round((food.y - view_y) * zoom))))
+                for food in self.food.particles
+                if left <= food.x <= right and top <= food.y <= bottom]
+    
+    def drop_food(self, x, y, count=12):
+        """Scatter food at (x, y); fish close enough to notice it start feeding"""
+        self.food.drop(x, y, self.rng, count)
+        for fish, _ in self.spatial_index.query(x, y, 250):
+            if fish.state != 'feeding':
+                fish.state = 'feeding'
+                until = self.tick + self.rng.randint(180, 400)
+                # An unchanged expiry is already queued; otherwise the earlier
+                # entry is left behind and skipped as stale
+                if until != fish.state_until:
+                    fish.state_until = until
+                    self.transitions.push(fish)
     
     def add_fish(self, sprite_path, x=None, y=None):
         if x is None:
-            x = random.randint(80, self.screen_width - 80)
+            x = self.rng.randint(80, self.screen_width - 80)
         if y is None:
-            y = random.randint(80, self.screen_height - 80)
-        fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height)
-        self.fish_list.append(fish)
+            y = self.rng.randint(80, self.screen_height - 80)
+        fish = Fish(sprite_path, x, y, self.screen_width, self.screen_height,
+                    sprite_cache=self.sprite_cache, rng=self.rng, tick=self.tick)
+        self._register(fish)
         return fish
     
+    def state_digest(self):
+        """Hash of every fish's simulation state, equal for runs with the same seed and ticks"""
+        digest = hashlib.sha256()
+        for fish in self.fish_list:
+            digest.update(repr((fish.x, fish.y, fish.velocity_x, fish.velocity_y, fish.direction,
+                                fish.target_direction, fish.energy, fish.state, fish.state_until)).encode())
+        return digest.hexdigest()
+    
+    def save_snapshot(self, path):
+        """Write every fish's simulation state and the RNG state to a binary snapshot"""
+        fish_list = self.fish_list
+        count = len(fish_list)
+        sprites = list(dict.fromkeys(fish.sprite_path for fish in fish_list))
+        sprite_index = {sprite_path: i for i, sprite_path in enumerate(sprites)}
+        state_codes = {state: i for i, state in enumerate(STATES)}
+        style_codes = {style: i for i, style in enumerate(SWIM_STYLES)}
+
+        def column(values, dtype):
+            return np.fromiter(values, dtype=dtype, count=count)
+
+        columns = {
+            'state': column((state_codes[fish.state] for fish in fish_list), np.int8),
+            'swim_style': column((style_codes[fish.swim_style] for fish in fish_list), np.int8),
+            'sprite': column((sprite_index[fish.sprite_path] for fish in fish_list), np.int32),
+            'flip_horizontal': column((fish.flip_horizontal for fish in fish_list), np.bool_),
+        }
+        for name in SNAPSHOT_FLOATS:
+            columns[name] = column(map(attrgetter(name), fish_list), np.float64)
+        for name in SNAPSHOT_INTS:
+            columns[name] = column(map(attrgetter(name), fish_list), np.int64)
+
+        write_snapshot(path, 'objects', columns, {
+            'screen_width': self.screen_width,
+            'screen_height': self.screen_height,
+            'flow': self.flow.to_meta(),
+            'tick': self.tick,
+            'next_serial': self._next_serial,
+            'rng': encode_rng_state(self.rng.getstate()),
+            'sprites': sprites,
+            'food': self.food.to_meta(),
+        })
+        print(f"💾 Saved {count} fish to {path}")
+        return path
+
+    def load_snapshot(self, path):
+        """Replace every fish with the ones in a snapshot; continuing runs exactly as the saved tank would"""
+        columns, meta, version = read_snapshot(path, kind='objects')
+        self.clear_all_fish()
+        self.screen_width = meta['screen_width']
+        self.screen_height = meta['screen_height']
+        self.flow = FlowField(self.screen_width, self.screen_height, self.rng)
+        if version >= FLOW_VERSION:
+            self.flow.load_meta(meta['flow'])
+        else:
+            self.flow.load_uniform(meta['water_current_x'], meta['water_current_y'], meta['current_change_timer'])
+        self.food = FoodSystem(self.screen_width, self.screen_height)
+        if version >= FOOD_VERSION:
+            self.food.load_meta(meta['food'])
+        self.rng.setstate(decode_rng_state(meta['rng']))
+        if version >= TRANSITIONS_VERSION:
+            self.tick = meta['tick']
+            self._next_serial = meta['next_serial']
+        else:
+            # Older snapshots stored a countdown per fish and no creation order;
+            # counted from tick 0 the countdown is the expiry tick
+            self.tick = 0
+            self._next_serial = len(columns['state_timer'])
+            columns = dict(columns, state_until=columns['state_timer'], serial=np.arange(self._next_serial))
+
+        sprites = [(sprite_path, self.sprite_cache.get(sprite_path), self.sprite_cache.get_atlas(sprite_path))
+                   for sprite_path in meta['sprites']]
+        count = len(columns['serial'])
+        # Bypass __init__, which would draw a fresh personality from the RNG, and
+        # fill each slot for every fish at once through its descriptor
+        restored = list(map(Fish.__new__, repeat(Fish, count)))
+
+        def assign(name, values):
+            deque(map(getattr(Fish, name).__set__, restored, values), maxlen=0)
+
+        for name in SNAPSHOT_FLOATS + SNAPSHOT_INTS:
+            assign(name, columns[name].tolist())
+        sprite_codes = columns['sprite'].tolist()
+        assign('sprite_path', [sprites[code][0] for code in sprite_codes])
+        assign('original_image', [sprites[code][1] for code in sprite_codes])
+        assign('image', [sprites[code][1] for code in sprite_codes])
+        assign('atlas', [sprites[code][2] for code in sprite_codes])
+        assign('state', [STATES[code] for code in columns['state'].tolist()])
+        assign('swim_style', [SWIM_STYLES[code] for code in columns['swim_style'].tolist()])
+        assign('flip_horizontal', columns['flip_horizontal'].tolist())
+        for name, value in (('rng', self.rng), ('screen_width', self.screen_width),
+                            ('screen_height', self.screen_height)):
+            assign(name, repeat(value, count))
+        # A stable sort orders equal depths by insertion, the same order _register builds one at a time
+        self.fish_list.extend(restored)
+        self.render_order.extend(sorted(restored, key=attrgetter('depth_layer')))
+        self._render_depths.extend(map(attrgetter('depth_layer'), self.render_order))
+        self.transitions.rebuild(restored)
+        print(f"📂 Loaded {len(self.fish_list)} fish from {path}")
+
     def get_fish_count(self):
         return len(self.fish_list)
     
     def clear_all_fish(self):
-        self.fish_list.clear()
\ No newline at end of file
+        self.fish_list.clear()
+        self.spatial_index.clear()
+        self.transitions.clear()
+        if self.lod is not None:
+            self.lod.forget()
+        self.render_order.clear()
+        self._render_depths.clear()
+    
+    def remove_fish(self, fish):
+        self.fish_list.remove(fish)
+        self.spatial_index.remove(fish)
+        # Its queued expiry no longer matches, so the queue skips it
+        fish.state_until = None
+        if self.lod is not None:
+            self.lod.forget(fish)
+        index = bisect.bisect_left(self._render_depths, fish.depth_layer)
+        while self.render_order[index] is not fish:
+            index += 1
+        del self.render_order[index]
+        del self._render_depths[index]
\ No newline at end of file
@@ -0,0 +1,71 @@
+#startup.py
+import json
+import os
+import platform
+import time
+from contextlib import contextmanager
+
+# Append each launch's report here as one JSON line to track cold starts over time
+LOG_ENVIRONMENT_VARIABLE = "AQUATIC_SIM_STARTUP_LOG"
+
+class StartupProfiler:
+    """
+    Wall-clock breakdown of everything between launch and the first presented
+    frame. Time spent waiting on the user is tracked separately and left out
+    of time-to-first-frame.
+    """
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = []
+        self.waiting = 0.0
+        self.first_frame_ms = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    @contextmanager
+    def user_wait(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.waiting += time.perf_counter() - start
+
+    def first_frame(self):
+        """Call after each present; only the first call records and reports"""
+        if self.first_frame_ms is not None:
+            return
+        self.first_frame_ms = (time.perf_counter() - self.origin - self.waiting) * 1000
+        self.report()
+
+    def summary(self):
+        staged_ms = sum(seconds for _, seconds in self.stages) * 1000
+        return {
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'machine': platform.node(),
+            'first_frame_ms': self.first_frame_ms,
+            'stages_ms': {name: seconds * 1000 for name, seconds in self.stages},
+            'other_ms': (self.first_frame_ms or 0.0) - staged_ms,
+            'user_wait_ms': self.waiting * 1000,
+        }
+
+    def report(self):
+        summary = self.summary()
+        print(f"⏱️ First frame after {summary['first_frame_ms']:.0f} ms")
+        for name, ms in summary['stages_ms'].items():
+            print(f"   {name:<22} {ms:8.1f} ms")
+        print(f"   {'other':<22} {summary['other_ms']:8.1f} ms")
+
+        log_path = os.environ.get(LOG_ENVIRONMENT_VARIABLE)
+        if log_path:
+            try:
+                with open(log_path, "a") as f:
+                    f.write(json.dumps(summary) + "\n")
+            except OSError as e:
+                print(f"⚠️ Could not write startup log: {e}")
+        return summary
@@ -0,0 +1,278 @@
+#swarm_engine.py
+import math
+import hashlib
+import time
+import numpy as np
+from src.sprite_manager import Fish, SpriteAssetCache
+from src.swarm_kernels import (EXPLORING, FIELDS, STYLE_FACTORS, SWIM_STYLES,
+                               step_behavior, step_physics)
+from src.snapshot import write_snapshot, read_snapshot, FLOW_VERSION
+from src.flow_field import FlowField
+
+class FishView:
+    """Render-only view of one fish stored in a SwarmEngine"""
+    _update_visual_state = Fish._update_visual_state
+
+    def __init__(self, engine, index, atlas, sprite_path):
+        self.engine = engine
+        self.index = index
+        self.atlas = atlas
+        self.sprite_path = sprite_path
+        self.image = atlas.get(False, 0, 1.0, 255)
+        self.rect = self.image.get_rect()
+        self.flip_horizontal = False
+        self.current_scale = 1.0
+
+    def __getattr__(self, name):
+        # Simulation state lives in the engine arrays
+        try:
+            array = self.engine.__dict__['arrays'][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return array[self.index]
+
+    def sync(self):
+        arrays = self.engine.arrays
+        self._update_visual_state()
+        self.rect = self.image.get_rect(center=(int(arrays['x'][self.index]), int(arrays['y'][self.index])))
+
+class LazyFishViews:
+    """
+    fish_list of a restored swarm. A view is only made the first time its
+    fish is looked at, so restoring costs the memory map and nothing per fish.
+    """
+    def __init__(self, engine, sprite_codes, sprites, atlases):
+        self._engine = engine
+        self._codes = sprite_codes
+        self._sprites = sprites
+        self._atlases = atlases
+        self._views = [None] * len(sprite_codes)
+
+    def __len__(self):
+        return len(self._views)
+
+    def __getitem__(self, index):
+        view = self._views[index]
+        if view is None:
+            index = range(len(self._views))[index]
+            code = int(self._codes[index])
+            view = self._views[index] = FishView(self._engine, index, self._atlases[code], self._sprites[code])
+        return view
+
+    def __iter__(self):
+        for index in range(len(self._views)):
+            yield self[index]
+
+    def extend(self, views):
+        self._views.extend(views)
+
+class SwarmEngine:
+    """
+    Structure-of-arrays fish simulation running the Fish.update rules as batched
+    NumPy operations. Offers the same interface as SpriteManager.
+    """
+    def __init__(self, screen_width=800, screen_height=600, seed=None):
+        self.screen_width = screen_width
+        self.screen_height = screen_height
+        self.rng = np.random.default_rng(seed)
+        self.flow = FlowField(screen_width, screen_height, self.rng)
+        self.sprite_cache = SpriteAssetCache()
+        self.profiler = None
+        self.previous_positions = None
+        self.fish_list = []
+        self._render_order = []
+        self.arrays = {}
+        self.clear_all_fish()
+
+    @property
+    def render_order(self):
+        # Sorted on first use after a restore rather than during it
+        if self._render_order is None:
+            order = np.argsort(self.arrays['depth_layer'], kind='stable').tolist()
+            self._render_order = [self.fish_list[i] for i in order]
+        return self._render_order
+
+    @render_order.setter
+    def render_order(self, views):
+        self._render_order = views
+
+    def _spawn(self, sprite_path, x, y, following_tendency=None, direction=None):
+        rng = self.rng
+        count = len(x)
+        style = rng.integers(0, len(SWIM_STYLES), count)
+        factors = STYLE_FACTORS[style]
+        raw_speed = rng.uniform(0.8, 2.5, count)
+        depth_layer = rng.uniform(0.3, 1.0, count)
+        if direction is None:
+            direction = rng.uniform(0, 360, count)
+        if following_tendency is None:
+            following_tendency = rng.uniform(0.1, 0.8, count) * factors[:, 2]
+        new = {
+            'x': np.asarray(x, dtype=np.float64), 'y': np.asarray(y, dtype=np.float64),
+            'velocity_x': np.zeros(count), 'velocity_y': np.zeros(count),
+            'direction': direction, 'target_direction': direction.copy(),
+            'speed': raw_speed * depth_layer, 'base_speed': raw_speed * factors[:, 0],
+            'energy': rng.uniform(0.7, 1.0, count) * factors[:, 4],
+            'depth_layer': depth_layer,
+            'tail_beat_frequency': rng.uniform(0.15, 0.35, count) * factors[:, 1],
+            'following_tendency': following_tendency,
+            'personal_space': rng.uniform(25, 60, count) * factors[:, 3],
+            'comfort_distance': rng.uniform(60, 120, count),
+            'boundary_comfort': rng.uniform(40, 80, count),
+            'swim_phase': rng.uniform(0, 2 * math.pi, count),
+            'body_undulation': rng.uniform(0.5, 1.5, count),
+            'time': np.zeros(count, dtype=np.int64),
+            'state': np.full(count, EXPLORING, dtype=np.int8),
+            'state_timer': rng.integers(180, 601, count),
+            'swim_style': style.astype(np.int8),
+        }
+        first = self.get_fish_count()
+        for name, dtype in FIELDS:
+            self.arrays[name] = np.concatenate([self.arrays[name], new[name].astype(dtype)])
+        atlas = self.sprite_cache.get_atlas(sprite_path)
+        views = [FishView(self, first + i, atlas, sprite_path) for i in range(count)]
+        self.fish_list.extend(views)
+        # Depth never changes, so the draw order only has to be rebuilt on spawn
+        self.render_order = sorted(self.fish_list, key=lambda f: f.depth_layer)
+        return views
+
+    def create_sprite(self, sprite_path, count=1):
+        x = self.rng.integers(80, self.screen_width - 80, count, endpoint=True)
+        y = self.rng.integers(80, self.screen_height - 80, count, endpoint=True)
+        self._spawn(sprite_path, x, y)
+
+    def create_school(self, sprite_path, count=5, center_x=None, center_y=None):
+        if center_x is None:
+            center_x = self.rng.integers(150, self.screen_width - 150, endpoint=True)
+        if center_y is None:
+            center_y = self.rng.integers(150, self.screen_height - 150, endpoint=True)
+        school_radius = min(80, count * 15)
+        i = np.arange(count)
+        angle = np.radians(i * 137.5)
+        radius = school_radius * np.sqrt(i / count)
+        x = np.clip(center_x + radius * np.cos(angle), 80, self.screen_width - 80)
+        y = np.clip(center_y + radius * np.sin(angle), 80, self.screen_height - 80)
+        direction = self.rng.uniform(0, 360, count) + self.rng.uniform(-30, 30, count)
+        self._spawn(sprite_path, x, y, self.rng.uniform(0.5, 0.9, count), direction)
+
+    def create_mixed_school(self, sprite_path, total_count=8):
+        remaining = total_count
+        school_count = self.rng.integers(2, 4, endpoint=True)
+        for i in range(school_count):
+            if remaining <= 0:
+                break
+            school_size = int(self.rng.integers(1, min(remaining, 4), endpoint=True))
+            center_x = self.rng.integers(150, self.screen_width - 150, endpoint=True)
+            center_y = self.rng.integers(150, self.screen_height - 150, endpoint=True)
+            self.create_school(sprite_path, school_size, center_x, center_y)
+            remaining -= school_size
+
+    def add_fish(self, sprite_path, x=None, y=None):
+        if x is None:
+            x = self.rng.integers(80, self.screen_width - 80, endpoint=True)
+        if y is None:
+            y = self.rng.integers(80, self.screen_height - 80, endpoint=True)
+        return self._spawn(sprite_path, [x], [y])[0]
+
+    def state_digest(self):
+        digest = hashlib.sha256()
+        for name, _ in FIELDS:
+            digest.update(self.arrays[name].tobytes())
+        return digest.hexdigest()
+
+    def _snapshot_meta(self):
+        return {
+            'screen_width': self.screen_width,
+            'screen_height': self.screen_height,
+            'flow': self.flow.to_meta(),
+            'rng': self.rng.bit_generator.state,
+        }
+
+    def _restore_meta(self, meta, version):
+        self.screen_width = meta['screen_width']
+        self.screen_height = meta['screen_height']
+        self.rng.bit_generator.state = meta['rng']
+        self.flow = FlowField(self.screen_width, self.screen_height, self.rng)
+        if version >= FLOW_VERSION:
+            self.flow.load_meta(meta['flow'])
+        else:
+            self.flow.load_uniform(meta['water_current_x'], meta['water_current_y'], meta['current_change_timer'])
+
+    def save_snapshot(self, path):
+        """Write the state arrays and RNG state to a binary snapshot"""
+        sprites = list(dict.fromkeys(view.sprite_path for view in self.fish_list))
+        sprite_index = {sprite_path: i for i, sprite_path in enumerate(sprites)}
+        columns = dict(self.arrays)
+        columns['sprite'] = np.fromiter((sprite_index[view.sprite_path] for view in self.fish_list),
+                                        dtype=np.int32, count=self.get_fish_count())
+        meta = self._snapshot_meta()
+        meta['sprites'] = sprites
+        write_snapshot(path, 'swarm', columns, meta)
+        print(f"💾 Saved {self.get_fish_count()} fish to {path}")
+        return path
+
+    def load_snapshot(self, path):
+        """
+        Replace every fish with the ones in a snapshot. The state arrays are
+        copy-on-write maps of the file, so pages are only read as the
+        simulation first touches them.
+        """
+        columns, meta, version = read_snapshot(path, kind='swarm', mode='c')
+        self._restore_meta(meta, version)
+        self.arrays = {name: columns[name] for name, _ in FIELDS}
+        atlases = [self.sprite_cache.get_atlas(sprite_path) for sprite_path in meta['sprites']]
+        self.fish_list = LazyFishViews(self, columns['sprite'], meta['sprites'], atlases)
+        self.render_order = None
+        self.previous_positions = None
+        print(f"📂 Loaded {self.get_fish_count()} fish from {path}")
+
+    def get_fish_count(self):
+        return len(self.arrays['x'])
+
+    def clear_all_fish(self):
+        self.arrays = {name: np.zeros(0, dtype=dtype) for name, dtype in FIELDS}
+        self.fish_list = []
+        self.render_order = []
+
+    def update_sprites(self):
+        self.simulate()
+        self.update_visuals()
+
+    def simulate(self):
+        self.flow.update()
+        if self.get_fish_count():
+            self.previous_positions = (self.arrays['x'].copy(), self.arrays['y'].copy())
+            self._advance()
+            current_x, current_y = self.flow.sample(self.arrays['x'], self.arrays['y'])
+            self.arrays['velocity_x'] += current_x
+            self.arrays['velocity_y'] += current_y
+
+    def _advance(self):
+        start = time.perf_counter()
+        step_behavior(self.arrays, self.rng, self.screen_width, self.screen_height)
+        middle = time.perf_counter()
+        step_physics(self.arrays, self.screen_width, self.screen_height)
+        if self.profiler is not None:
+            self.profiler.add('behavior', middle - start)
+            self.profiler.add('physics', time.perf_counter() - middle)
+
+    def update_visuals(self):
+        start = time.perf_counter()
+        for fish in self.fish_list:
+            fish.sync()
+        if self.profiler is not None:
+            self.profiler.add('visuals', time.perf_counter() - start)
+
+    def draw_sprites(self, screen, alpha=1.0):
+        """Draw back to front, alpha < 1 places fish between their last two simulated positions"""
+        previous = self.previous_positions
+        if alpha >= 1.0 or previous is None or len(previous[0]) != self.get_fish_count():
+            sequence = [(fish.image, fish.rect) for fish in self.render_order]
+        else:
+            lag = 1.0 - alpha
+            shift_x = np.rint((previous[0] - self.arrays['x']) * lag).astype(int).tolist()
+            shift_y = np.rint((previous[1] - self.arrays['y']) * lag).astype(int).tolist()
+            sequence = [(fish.image, fish.rect.move(shift_x[fish.index], shift_y[fish.index]))
+                        for fish in self.render_order]
+        screen.blits(sequence, doreturn=False)
+        return [rect for _, rect in sequence]
@@ -0,0 +1,272 @@
+#swarm_kernels.py
+# Array kernels shared by SwarmEngine and its worker processes, kept free of pygame
+import math
+import numpy as np
+
+STATES = ('exploring', 'schooling', 'feeding', 'resting')
+EXPLORING, SCHOOLING, FEEDING, RESTING = range(len(STATES))
+SWIM_STYLES = ('cruiser', 'darting', 'lazy', 'active')
+
+# (base_speed, tail_beat_frequency, following_tendency, personal_space, energy) multipliers,
+# matching Fish._setup_swim_style
+STYLE_FACTORS = np.array([
+    [0.8, 0.7, 1.2, 1.0, 1.0],
+    [1.4, 1.5, 1.0, 0.7, 1.0],
+    [0.6, 0.5, 1.0, 1.0, 0.8],
+    [1.1, 1.2, 1.0, 1.0, 1.0],
+])
+
+FIELDS = (
+    ('x', np.float64), ('y', np.float64),
+    ('velocity_x', np.float64), ('velocity_y', np.float64),
+    ('direction', np.float64), ('target_direction', np.float64),
+    ('speed', np.float64), ('base_speed', np.float64), ('energy', np.float64),
+    ('depth_layer', np.float64), ('tail_beat_frequency', np.float64),
+    ('following_tendency', np.float64), ('personal_space', np.float64),
+    ('comfort_distance', np.float64), ('boundary_comfort', np.float64),
+    ('swim_phase', np.float64), ('body_undulation', np.float64),
+    ('time', np.int64), ('state', np.int8), ('state_timer', np.int64),
+    ('swim_style', np.int8),
+)
+
+PANIC_DISTANCE = 20
+ACCELERATION = 0.03
+DRAG = 0.95
+STATE_RADIUS = 100
+
+def _wrap_once(angle):
+    # Fish only folds a turn back into [-180, 180] once, keep that behavior
+    angle = np.where(angle > 180, angle - 360, angle)
+    return np.where(angle < -180, angle + 360, angle)
+
+def neighbor_totals(x, y, direction, energy, speed, comfort_distance, personal_space,
+                    query=None, chunk_size=1024):
+    """
+    Vectorized NeighborContext for the fish indexed by query (all fish by default).
+    Fish are sorted into horizontal strips half the largest query radius tall
+    and by x within each strip. A fish's candidates are then, in each of the
+    five strips its radius can reach, the run whose x lies within its own
+    radius, found by binary search. That is about half the pairs a 3x3 block
+    of radius-sized cells yields, and still exact. Query fish are processed
+    in chunks to bound memory.
+    """
+    count = len(x)
+    if query is None:
+        query = np.arange(count)
+    totals = {
+        'nearby_count': np.zeros(len(query), dtype=np.int64),
+        'neighbors': np.zeros(len(query), dtype=np.int64),
+        'separation_x': np.zeros(len(query)), 'separation_y': np.zeros(len(query)),
+        'alignment_x': np.zeros(len(query)), 'alignment_y': np.zeros(len(query)),
+        'cohesion_x': np.zeros(len(query)), 'cohesion_y': np.zeros(len(query)),
+        'leader': np.full(len(query), -1, dtype=np.int64),
+    }
+    if count < 2 or len(query) == 0:
+        return totals
+
+    radius = np.maximum(STATE_RADIUS, comfort_distance)
+    strip_height = float(radius.max()) / 2
+    strip = np.floor((y - y.min()) / strip_height)
+    # Each strip gets its own stretch of one sorted number line, spaced so a
+    # radius window never reaches into the next strip
+    left = x.min()
+    spacing = float(x.max() - left) + 4 * strip_height + 1
+    line = strip * spacing + (x - left)
+    order = np.argsort(line, kind='stable')
+    sorted_line = line[order]
+    strip_offsets = np.arange(-2, 3) * spacing
+
+    # Gather neighbor attributes in sorted order so each window is contiguous
+    sorted_x, sorted_y = x[order], y[order]
+    heading = np.radians(direction[order])
+    heading_x, heading_y = np.cos(heading), np.sin(heading)
+    leader_score = (energy * speed)[order]
+    size = len(query)
+
+    # Where each fish landed in the sorted order, to skip pairing a fish with itself
+    rank = np.empty(count, dtype=np.int64)
+    rank[order] = np.arange(count)
+    reach_sq = radius ** 2
+
+    # Walk the query fish in sorted order too, keeping pair gathers cache friendly
+    query_order = np.argsort(line[query], kind='stable')
+    for start in range(0, size, chunk_size):
+        local = query_order[start:start + chunk_size]
+        fish = query[local]
+        centers = (line[fish][:, None] + strip_offsets[None, :]).ravel()
+        reach = np.repeat(radius[fish], len(strip_offsets))
+        first = np.searchsorted(sorted_line, centers - reach)
+        counts = np.searchsorted(sorted_line, centers + reach) - first
+        total = counts.sum()
+        if total == 0:
+            continue
+        run_start = np.cumsum(counts) - counts
+        other = np.repeat(first - run_start, counts) + np.arange(total)
+        # Each query fish owns one contiguous run of pairs, so its own values
+        # are repeated along the run instead of gathered per pair
+        per_fish = counts.reshape(len(local), -1).sum(axis=1)
+        dx = np.repeat(x[fish], per_fish) - sorted_x[other]
+        dy = np.repeat(y[fish], per_fish) - sorted_y[other]
+        distance_sq = dx * dx + dy * dy
+        keep = np.flatnonzero((distance_sq < np.repeat(reach_sq[fish], per_fish)) &
+                              (other != np.repeat(rank[fish], per_fish)))
+        # Pairs from here on are keyed by the query fish's position in this chunk
+        pair = np.repeat(np.arange(len(local)), per_fish)[keep]
+        other, dx, dy = other[keep], dx[keep], dy[keep]
+        distance = np.sqrt(distance_sq[keep])
+        chunk = len(local)
+
+        totals['nearby_count'][local] += np.bincount(pair[distance < STATE_RADIUS], minlength=chunk)
+        in_comfort = np.flatnonzero(distance < comfort_distance[fish][pair])
+
+        # Leader: the highest energy * speed neighbor within comfort distance
+        lead_pair, lead_other = pair[in_comfort], other[in_comfort]
+        if len(lead_pair):
+            # Pairs are grouped by query fish, so a segmented max finds each leader
+            score = leader_score[lead_other]
+            group_start = np.flatnonzero(np.r_[True, lead_pair[1:] != lead_pair[:-1]])
+            group_max = np.maximum.reduceat(score, group_start)
+            best = np.flatnonzero(score == np.repeat(group_max, np.diff(np.r_[group_start, len(score)])))
+            best = best[np.r_[True, lead_pair[best[1:]] != lead_pair[best[:-1]]]]
+            totals['leader'][local[lead_pair[best]]] = order[lead_other[best]]
+
+        boids = in_comfort[distance[in_comfort] > 0]
+        pair, other = pair[boids], other[boids]
+        dx, dy, distance = dx[boids], dy[boids], distance[boids]
+        totals['neighbors'][local] += np.bincount(pair, minlength=chunk)
+        crowded = distance < personal_space[fish][pair]
+        push = np.where(crowded, 1 / np.where(crowded, distance, 1.0), 0)
+        for name, weights in (('separation_x', dx * push), ('separation_y', dy * push),
+                              ('alignment_x', heading_x[other]), ('alignment_y', heading_y[other]),
+                              ('cohesion_x', sorted_x[other]), ('cohesion_y', sorted_y[other])):
+            totals[name][local] += np.bincount(pair, weights=weights, minlength=chunk)
+    return totals
+
+def step_behavior(a, rng, width, height, query=None):
+    """
+    Neighbor pass, state machine, boundaries, boids and per-state behaviors for
+    the arrays in a. With query, only those fish get neighbor totals; the rest
+    are treated as halo fish whose results the caller discards.
+    """
+    x, y = a['x'], a['y']
+    count = len(x)
+    direction, target = a['direction'], a['target_direction']
+    speed, base_speed, energy = a['speed'], a['base_speed'], a['energy']
+    state, state_timer = a['state'], a['state_timer']
+    following_tendency = a['following_tendency']
+    a['time'] += 1
+    state_timer -= 1
+    totals = neighbor_totals(x, y, direction, energy, speed,
+                             a['comfort_distance'], a['personal_space'], query)
+    if query is not None:
+        for name, values in totals.items():
+            expanded = np.full(count, -1 if name == 'leader' else 0, dtype=values.dtype)
+            expanded[query] = values
+            totals[name] = expanded
+
+    # Behavior state machine
+    expired = state_timer <= 0
+    if expired.any():
+        roll = rng.random(count)
+        schooling = expired & (totals['nearby_count'] >= 3)
+        resting = expired & ~schooling & (energy < 0.3)
+        feeding = expired & ~schooling & ~resting & (roll < 0.3)
+        exploring = expired & ~schooling & ~resting & ~feeding
+        for mask, new_state, low, high in ((schooling, SCHOOLING, 300, 900), (resting, RESTING, 120, 300),
+                                       (feeding, FEEDING, 180, 400), (exploring, EXPLORING, 200, 600)):
+            state[mask] = new_state
+            state_timer[mask] = rng.integers(low, high, mask.sum(), endpoint=True)
+
+    # Boundaries: panic at the first wall closer than PANIC_DISTANCE, else steer away softly
+    distances = (x, width - x, y, height - y)
+    panic_ranges = ((-30, 30), (150, 210), (45, 135), (225, 315))
+    panicked = np.zeros(count, dtype=bool)
+    for distance, (low, high) in zip(distances, panic_ranges):
+        mask = ~panicked & (distance < PANIC_DISTANCE)
+        target[mask] = rng.uniform(low, high, mask.sum())
+        panicked |= mask
+    speed[panicked] = base_speed[panicked] * 1.5
+    calm = ~panicked
+    comfort = a['boundary_comfort']
+    strength = [np.where(calm & (d < comfort), (comfort - d) / comfort, 0) for d in distances]
+    target += strength[2] * 20 - strength[3] * 20
+    target += (strength[0] * 45 - strength[1] * 45) * 0.1
+
+    # Boids
+    if count > 1:
+        neighbors = totals['neighbors']
+        active = neighbors > 0
+        sep_x, sep_y = totals['separation_x'], totals['separation_y']
+        separating = active & ((sep_x != 0) | (sep_y != 0))
+        target[separating] = np.degrees(np.arctan2(sep_y[separating], sep_x[separating]))
+        aligning = active & ~separating
+        safe = np.maximum(neighbors, 1)
+        desired_x = totals['alignment_x'] / safe * 0.3 + (totals['cohesion_x'] / safe - x) * 0.1
+        desired_y = totals['alignment_y'] / safe * 0.3 + (totals['cohesion_y'] / safe - y) * 0.1
+        aligning &= (desired_x != 0) | (desired_y != 0)
+        direction_diff = _wrap_once(np.degrees(np.arctan2(desired_y, desired_x)) - target)
+        target += np.where(aligning, direction_diff * 0.15 * following_tendency, 0)
+
+    # Per-state behaviors
+    exploring = state == EXPLORING
+    turning = exploring & (rng.random(count) < 0.008)
+    target[turning] += rng.uniform(-60, 60, turning.sum())
+    diving = exploring & (rng.random(count) < 0.005)
+    up = diving & (y < height * 0.3)
+    down = diving & ~up & (y > height * 0.7)
+    target[up] = rng.uniform(45, 135, up.sum())
+    target[down] = rng.uniform(225, 315, down.sum())
+
+    leader = totals['leader']
+    following = (state == SCHOOLING) & (leader >= 0)
+    influence = 0.3 * following_tendency[following]
+    target[following] = (target[following] * (1 - influence) +
+                         direction[leader[following]] * influence)
+
+    feeding = state == FEEDING
+    target_y = height * rng.uniform(0.4, 0.6, count)
+    seeking = feeding & (np.abs(y - target_y) > 20)
+    sink = seeking & (y < target_y)
+    rise = seeking & ~sink
+    target[sink] = rng.uniform(45, 135, sink.sum())
+    target[rise] = rng.uniform(225, 315, rise.sum())
+    speed[feeding] = base_speed[feeding] * 0.6
+
+    resting = state == RESTING
+    settling = resting & (y < height * 0.7)
+    target[settling] = rng.uniform(45, 135, settling.sum())
+    speed[resting] = base_speed[resting] * 0.3
+    energy[resting] = np.minimum(1.0, energy[resting] + 0.002)
+
+def step_physics(a, width, height):
+    """Turning, velocity, energy, swimming motion and movement for the arrays in a"""
+    x, y = a['x'], a['y']
+    direction, target = a['direction'], a['target_direction']
+    speed, base_speed, energy = a['speed'], a['base_speed'], a['energy']
+    direction_diff = _wrap_once(target - direction)
+    max_turn_rate = 4.0 * (energy * 0.5 + 0.5)
+    direction += np.clip(direction_diff, -max_turn_rate, max_turn_rate)
+    direction[direction < 0] += 360
+    direction[direction >= 360] -= 360
+    heading = np.radians(direction)
+    vx, vy = a['velocity_x'], a['velocity_y']
+    vx += (np.cos(heading) * speed - vx) * ACCELERATION
+    vy += (np.sin(heading) * speed - vy) * ACCELERATION
+    vx *= DRAG
+    vy *= DRAG
+    energy[:] = np.maximum(0.1, energy - (np.abs(vx) + np.abs(vy)) * 0.0001)
+
+    # Natural swimming motion
+    phase = a['time'] * a['tail_beat_frequency'] + a['swim_phase']
+    tail_beat = np.sin(phase)
+    perpendicular = heading + math.pi / 2
+    vx += np.cos(perpendicular) * tail_beat * a['body_undulation'] * 0.1
+    vy += np.sin(perpendicular) * tail_beat * a['body_undulation'] * 0.1
+    vy += np.sin(a['time'] * 0.01 + a['swim_phase']) * 0.2
+    speed[:] = base_speed * (1 + tail_beat * 0.1) * (energy * 0.3 + 0.7)
+
+    margin = 10
+    x += vx
+    y += vy
+    np.clip(x, margin, width - margin, out=x)
+    np.clip(y, margin, height - margin, out=y)
@@ -0,0 +1,39 @@
+#transitions.py
+import heapq
+from operator import attrgetter
+
+class TransitionQueue:
+    """
+    Behavior state expiries keyed by simulation tick. Each tick only the fish
+    whose state ran out are popped, so the cost follows the number of
+    transitions instead of the population. Ties pop in serial (creation)
+    order, which a snapshot restores, so replays stay deterministic.
+    """
+    def __init__(self):
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, fish):
+        heapq.heappush(self._heap, (fish.state_until, fish.serial, fish))
+
+    def pop_due(self, tick):
+        """Fish whose state expires at or before tick"""
+        heap = self._heap
+        due = {}
+        while heap and heap[0][0] <= tick:
+            until, _, fish = heapq.heappop(heap)
+            # Removed fish have their expiry cleared and leave a stale entry behind;
+            # a fish rescheduled to the same tick has two entries but fires once
+            if fish.state_until == until:
+                due[fish] = None
+        return list(due)
+
+    def rebuild(self, fish_list):
+        fish_list = list(fish_list)
+        self._heap = list(zip(map(attrgetter('state_until'), fish_list), map(attrgetter('serial'), fish_list), fish_list))
+        heapq.heapify(self._heap)
+
+    def clear(self):
+        self._heap = []
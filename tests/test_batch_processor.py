@@ -0,0 +1,9 @@
+#test_batch_processor.py
+from src.batch_processor import process_image
+
+def test_unreadable_input_records_the_load_error(tmp_path):
+    broken = tmp_path / "broken.jpg"
+    broken.write_text("not an image")
+    entry = process_image((str(broken), str(tmp_path / "out" / "broken"), (240,), False))
+    assert entry['output'] is None
+    assert entry['error'] == f"Failed to read {broken}"
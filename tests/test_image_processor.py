@@ -0,0 +1,33 @@
+#test_image_processor.py
+import os
+import cv2
+import numpy as np
+from src.image_processor import load_image, find_mask_candidates, remove_white_background_sweep
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "assets", "input", "fish.jpg")
+
+def _background(gray, near_white=245):
+    # The fish is line art with a white body, so only white connected to the
+    # image border is background
+    _, labels = cv2.connectedComponents((gray >= near_white).astype(np.uint8), connectivity=4)
+    border = np.unique(np.concatenate([labels[0], labels[-1], labels[:, 0], labels[:, -1]]))
+    return np.isin(labels, border[border != 0])
+
+def test_sample_mask_has_no_opaque_background():
+    img = load_image(SAMPLE)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    best = find_mask_candidates(img)[0]
+    assert np.count_nonzero((best['mask'] == 255) & _background(gray)) == 0
+
+def test_edge_method_is_not_scored_against_its_own_edges():
+    img = load_image(SAMPLE)
+    scores = {(c['method'], c['threshold']): c['score'] for c in find_mask_candidates(img)}
+    best_threshold = max(score for (method, _), score in scores.items() if method == 'color_threshold')
+    assert scores.get(('edge_detection', None), 0.0) < best_threshold
+
+def test_written_sprite_has_no_halo(tmp_path):
+    output = str(tmp_path / "fish_transparent.png")
+    assert remove_white_background_sweep(SAMPLE, output)
+    sprite = cv2.imread(output, cv2.IMREAD_UNCHANGED)
+    gray = cv2.cvtColor(sprite[:, :, :3], cv2.COLOR_BGR2GRAY)
+    assert np.count_nonzero((sprite[:, :, 3] == 255) & _background(gray)) == 0
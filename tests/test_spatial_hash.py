@@ -0,0 +1,42 @@
+#test_spatial_hash.py
+import random
+import pytest
+from src.sprite_manager import Fish
+from src.spatial_hash import SpatialHash
+
+def _layout(seed, count, width, height):
+    rng = random.Random(seed)
+    fish_list = []
+    for _ in range(count):
+        # Only positions matter to the neighbor scan, skip sprite loading
+        fish = Fish.__new__(Fish)
+        fish.x = rng.uniform(0, width)
+        fish.y = rng.uniform(0, height)
+        fish_list.append(fish)
+    return rng, fish_list
+
+@pytest.mark.parametrize("seed", range(20))
+def test_query_and_count_match_brute_force(seed):
+    rng, fish_list = _layout(seed, random.Random(seed).randint(1, 300), 1200, 800)
+    index = SpatialHash()
+    index.rebuild(fish_list, rng.choice([40, 100, 120, 250]))
+    for fish in fish_list:
+        radius = rng.uniform(5, 300)
+        expected = fish._nearby_fish(fish_list, radius)
+        found = index.query(fish.x, fish.y, radius, exclude=fish)
+        assert {id(f): d for f, d in found} == pytest.approx({id(f): d for f, d in expected})
+        assert index.count(fish.x, fish.y, radius, exclude=fish) == len(expected)
+
+def test_points_outside_the_grid_origin():
+    rng, fish_list = _layout(7, 200, 300, 300)
+    for fish in fish_list:
+        # Negative coordinates land in negative cells
+        fish.x -= 150
+        fish.y -= 150
+    index = SpatialHash(cell_size=64)
+    index.rebuild(fish_list)
+    for fish in fish_list:
+        expected = fish._nearby_fish(fish_list, 90)
+        assert index.count(fish.x, fish.y, 90, exclude=fish) == len(expected)
+        assert sorted(id(f) for f, _ in index.query(fish.x, fish.y, 90, exclude=fish)) == \
+            sorted(id(f) for f, _ in expected)